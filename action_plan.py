@@ -0,0 +1,145 @@
+from collections import namedtuple
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+SELECTOR_TYPES = {
+    "CSS": By.CSS_SELECTOR,
+    "ID": By.ID,
+    "XPATH": By.XPATH
+}
+
+class Condition(namedtuple("Condition", "kind text")):
+    """Parsed `exists`, `not_exists` or `contains:<text>` condition"""
+    __slots__ = ()
+
+    @classmethod
+    def parse(cls, text):
+        """Condition for a condition string, None if empty; raises ValueError if unknown"""
+        text = str(text or "").strip()
+        if not text:
+            return None
+        if text in ("exists", "not_exists"):
+            return cls(text, "")
+        if text.startswith("contains:"):
+            return cls("contains", text.split(":", 1)[1])
+        raise ValueError(f"unknown condition '{text}' (use exists, not_exists or contains:text)")
+
+class _Step:
+    """Shared behaviour of compiled steps; subclasses are immutable namedtuples"""
+    __slots__ = ()
+    needs_element = True
+
+    @property
+    def label(self):
+        return f"action {self.order} ({self.name})"
+
+    def find(self, automator):
+        """Wait for the step's element to be present; None on timeout"""
+        return automator.waits.until(EC.presence_of_element_located((self.by, self.selector)), automator.wait_timeout)
+
+class ClickStep(_Step, namedtuple("ClickStep", "order selector_type by selector delay condition")):
+    __slots__ = ()
+    name = "click"
+
+    def execute(self, automator):
+        element = self.find(automator)
+        if not element:
+            return False
+        element.click()
+        return True
+
+class InputStep(_Step, namedtuple("InputStep", "order selector_type by selector delay value")):
+    __slots__ = ()
+    name = "input"
+    condition = None  # The condition column holds the text to type
+
+    def execute(self, automator):
+        element = self.find(automator)
+        if not element:
+            return False
+        element.clear()
+        element.send_keys(self.value)
+        return True
+
+class WaitStep(_Step, namedtuple("WaitStep", "order selector_type by selector delay condition")):
+    __slots__ = ()
+    name = "wait"
+
+    def execute(self, automator):
+        return bool(self.find(automator))
+
+class ConfirmStep(_Step, namedtuple("ConfirmStep", "order delay auto_accept")):
+    __slots__ = ()
+    name = "confirm"
+    needs_element = False
+    selector_type = by = None
+    selector = ""
+    condition = None
+
+    def execute(self, automator):
+        # A dialog blocks the page, so wait for the dialog itself rather than an element
+        alert = automator.waits.wait_for_alert(automator.wait_timeout)
+        if not alert:
+            return False
+        if self.auto_accept:
+            alert.accept()
+        return True
+
+class SkipStep(_Step, namedtuple("SkipStep", "order selector_type by selector delay condition")):
+    __slots__ = ()
+    name = "skip"
+
+STEP_TYPES = {step.name: step for step in (ClickStep, InputStep, WaitStep, ConfirmStep, SkipStep)}
+
+class ActionPlan:
+    """Post-submit actions compiled once per run into ordered, validated, immutable steps.
+
+    Click and wait steps with a condition run only when it holds for their own element,
+    e.g. `exists` clicks a banner's close button only when the banner is shown.
+    """
+    def __init__(self, actions, auto_confirm=False):
+        self.errors = []
+        steps = []
+        for action in actions:
+            try:
+                steps.append(self._compile(action, self._order(action), auto_confirm))
+            except (KeyError, ValueError) as e:
+                self.errors.append(f"Action {action.get('order', '?')} ({action.get('action', '?')}): {e}")
+        self.steps = tuple(sorted(steps, key=lambda step: step.order))
+
+    @staticmethod
+    def _order(action):
+        """The action's position as an int; hand-edited and older configs may hold it as text"""
+        if 'order' not in action:
+            raise ValueError("order is missing")
+        try:
+            return int(action['order'])
+        except (TypeError, ValueError):
+            raise ValueError(f"order must be a whole number, not '{action['order']}'")
+
+    @staticmethod
+    def _compile(action, order, auto_confirm):
+        kind = action['action']
+        if kind not in STEP_TYPES:
+            raise ValueError(f"unknown action type '{kind}'")
+        delay = float(action.get('delay') or 0)
+        if delay < 0:
+            raise ValueError("delay can't be negative")
+        if kind == "confirm":
+            return ConfirmStep(order, delay, bool(auto_confirm))
+
+        selector = str(action.get('selector') or "").strip()
+        if not selector:
+            raise ValueError("selector is empty")
+        selector_type = str(action.get('selector_type') or "CSS").upper()
+        if selector_type not in SELECTOR_TYPES:
+            raise ValueError(f"unknown selector type '{selector_type}'")
+        by = SELECTOR_TYPES[selector_type]
+
+        if kind == "input":
+            value = action.get('value', action.get('condition', ''))
+            return InputStep(order, selector_type, by, selector, delay, str(value))
+        condition = Condition.parse(action.get('condition'))
+        if kind == "skip" and condition is None:
+            condition = Condition("exists", "")  # Bare skip actions always meant "skip if present"
+        return STEP_TYPES[kind](order, selector_type, by, selector, delay, condition)
@@ -0,0 +1,391 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+from openpyxl import Workbook
+from web_automation import WebAutomator
+from settings_manager import SettingsManager
+from progress_sink import ProgressSink
+from tracer import Tracer, percentile
+
+LOGIN_PAGE = """<!DOCTYPE html>
+<html><head><title>Login</title></head>
+<body>
+<form method="post" action="/login">
+  <input type="text" name="username" placeholder="Username">
+  <input type="password" name="password">
+  <button type="submit">Login</button>
+</form>
+</body></html>"""
+
+# Just enough of jQuery for pages that post with jQuery.ajax and expose jQuery.active
+JQUERY_SHIM = """
+window.jQuery = window.$ = {
+    active: 0,
+    ajax: function(options) {
+        var xhr = new XMLHttpRequest();
+        jQuery.active++;
+        xhr.open(options.type || 'GET', options.url);
+        xhr.setRequestHeader('Content-Type', 'application/x-www-form-urlencoded');
+        xhr.onloadend = function() {
+            jQuery.active--;
+            if (xhr.status < 400 && options.success) { options.success(xhr.responseText); }
+        };
+        xhr.send(options.data || null);
+    }
+};
+"""
+
+FORM_PAGE = """<!DOCTYPE html>
+<html><head><title>Form</title><script src="/jquery.js"></script></head>
+<body>
+<form id="entry" method="post" action="/submit">
+{fields}
+  <button type="submit" id="submit">Save</button>
+</form>
+<script>
+var ajax = {ajax}, alerts = {alerts};
+if (!ajax && alerts && location.search.indexOf('saved=1') >= 0) {{
+    alert('Saved');
+}}
+document.getElementById('entry').addEventListener('submit', function(event) {{
+    if (!ajax) {{ return; }}
+    event.preventDefault();
+    var form = this;
+    jQuery.ajax({{
+        type: 'POST',
+        url: '/submit',
+        data: new URLSearchParams(new FormData(form)).toString(),
+        success: function() {{
+            if (alerts) {{ alert('Saved'); }}
+            form.reset();
+        }}
+    }});
+}});
+</script>
+</body></html>"""
+
+class BenchmarkServer:
+    """Local stand-in web app: a login page and a multi-field form with injectable latency"""
+    def __init__(self, field_count=10, latency=0.0, alerts=False, ajax=False):
+        self.field_count = field_count
+        self.latency = latency
+        self.alerts = alerts
+        self.ajax = ajax
+        self.submissions = 0
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def form_page(self):
+        fields = "\n".join(
+            f'  <label>Field {i}<input type="text" id="field_{i}" name="field_{i}"></label>'
+            for i in range(self.field_count)
+        )
+        return FORM_PAGE.format(
+            fields=fields, ajax=str(self.ajax).lower(), alerts=str(self.alerts).lower()
+        )
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+            def _send(self, status, body=b"", content_type="text/html", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _logged_in(self):
+                return "session=ok" in self.headers.get("Cookie", "")
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                path = urlsplit(self.path).path
+                if path == "/login":
+                    self._send(200, LOGIN_PAGE.encode())
+                elif path == "/form":
+                    if not self._logged_in():
+                        self._send(303, headers={"Location": "/login"})
+                    else:
+                        self._send(200, server.form_page().encode())
+                elif path == "/jquery.js":
+                    self._send(200, JQUERY_SHIM.encode(), "application/javascript")
+                else:
+                    self._send(204)
+
+            def do_POST(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                path = urlsplit(self.path).path
+                if path == "/login":
+                    self._send(303, headers={"Location": "/form", "Set-Cookie": "session=ok; Path=/"})
+                elif path == "/submit" and self._logged_in():
+                    with server.lock:
+                        server.submissions += 1
+                    if server.ajax:
+                        self._send(200, b'{"ok": true}', "application/json")
+                    else:
+                        location = "/form?saved=1" if server.alerts else "/form"
+                        self._send(303, headers={"Location": location})
+                else:
+                    self._send(403)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class BenchmarkSink(ProgressSink):
+    """Counts failed rows and keeps the run quiet unless verbose"""
+    def __init__(self, verbose=False):
+        super().__init__()
+        self.verbose = verbose
+        self.failed_rows = 0
+
+    def update_status(self, message):
+        if "Error in row" in message:
+            self.failed_rows += 1
+        if self.verbose:
+            print(message)
+
+class RssSampler:
+    """Samples peak resident memory of this process and its child processes (Linux /proc)"""
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak_children_kb = 0
+        self.running = False
+        self.thread = None
+
+    @staticmethod
+    def _children_rss_kb(root_pid):
+        parents = {}
+        rss = {}
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/status") as f:
+                    fields = dict(line.split(":", 1) for line in f if ":" in line)
+            except OSError:
+                continue
+            pid = int(entry)
+            parents[pid] = int(fields.get("PPid", "0").strip())
+            rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+        total = 0
+        for pid in rss:
+            ancestor = parents.get(pid)
+            while ancestor and ancestor != root_pid:
+                ancestor = parents.get(ancestor)
+            if ancestor == root_pid:
+                total += rss[pid]
+        return total
+
+    def _run(self):
+        while self.running:
+            self.peak_children_kb = max(self.peak_children_kb, self._children_rss_kb(os.getpid()))
+            time.sleep(self.interval)
+
+    def start(self):
+        if os.path.isdir("/proc"):
+            self.running = True
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join()
+
+def peak_self_rss_mb():
+    """Peak resident memory of this process in MB, or None where it can't be read"""
+    if sys.platform == "win32":
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    import resource  # Unix only
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def format_mb(value):
+    return "n/a" if value is None else f"{value}MB"
+
+def write_workbook(path, rows, field_count):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([f"Field {i}" for i in range(field_count)])
+    for row in range(rows):
+        sheet.append([f"value {row}-{i}" for i in range(field_count)])
+    workbook.save(path)
+
+def build_config(server, excel_path, fill_mode):
+    actions = [
+        {"order": 1, "action": "click", "selector_type": "ID", "selector": "submit", "condition": "", "delay": 0}
+    ]
+    if server.alerts:
+        actions.append(
+            {"order": 2, "action": "confirm", "selector_type": "CSS", "selector": "body", "condition": "", "delay": 0}
+        )
+    return {
+        "url": server.base_url + "/login",
+        "form_url": server.base_url + "/form",
+        "username": "bench",
+        "password": "bench",
+        "excel_file": excel_path,
+        "excel_sheet": "Data",
+        "field_mappings": [
+            {"excel_column": f"Field {i}", "selector_type": "ID", "web_selector": f"field_{i}", "fill_mode": fill_mode}
+            for i in range(server.field_count)
+        ],
+        "post_submit_actions": actions,
+        "auto_confirm": True
+    }
+
+def run_case(server, rows, args, work_dir):
+    from excel_handler import ExcelHandler
+
+    excel_path = os.path.join(work_dir, f"bench_{rows}.xlsx")
+    write_workbook(excel_path, rows, server.field_count)
+
+    settings = SettingsManager.DEFAULT_SETTINGS.copy()
+    settings.update({
+        "headless": 0 if args.show_browser else 1,
+        "worker_count": args.workers,
+        "resume_runs": 0  # Every case must process all rows
+    })
+
+    sink = BenchmarkSink(verbose=args.verbose)
+    tracer = Tracer(enabled=True)
+    automator = WebAutomator(build_config(server, excel_path, args.fill_mode), sink, settings, tracer=tracer)
+    data = ExcelHandler(excel_path).get_rows("Data", stream=bool(settings.get('stream_excel', 1)))
+
+    submissions_before = server.submissions
+    sampler = RssSampler().start()
+    started = time.perf_counter()
+    automator.run_automation(data)
+    wall_seconds = time.perf_counter() - started
+    sampler.stop()
+    harness_rss = peak_self_rss_mb()
+
+    row_durations = sorted(
+        duration for name, _, duration, _, _ in tracer.events if name == "fill_form"
+    )
+    login_seconds = sum(duration for name, _, duration, _, _ in tracer.events if name == "login")
+    return {
+        "rows": rows,
+        "submitted": server.submissions - submissions_before,
+        "failed": sink.failed_rows,
+        "wall_seconds": round(wall_seconds, 3),
+        "login_seconds": round(login_seconds, 3),
+        "rows_per_sec": round(rows / wall_seconds, 3) if wall_seconds else 0,
+        "latency_ms": {
+            "p50": round(percentile(row_durations, 50) * 1000, 1),
+            "p95": round(percentile(row_durations, 95) * 1000, 1),
+            "p99": round(percentile(row_durations, 99) * 1000, 1)
+        },
+        "peak_rss_mb": {
+            "harness": None if harness_rss is None else round(harness_rss, 1),
+            # Sampled from /proc, so not measured on Windows
+            "browser": round(sampler.peak_children_kb / 1024, 1) if sampler.thread else None
+        }
+    }
+
+def compare(results, baseline_path):
+    """Print rows/sec and p50 latency relative to a previously saved result file"""
+    with open(baseline_path, 'r') as f:
+        baseline = {case["rows"]: case for case in json.load(f)["results"]}
+    for case in results:
+        base = baseline.get(case["rows"])
+        if not base:
+            continue
+        speedup = case["rows_per_sec"] / base["rows_per_sec"] if base["rows_per_sec"] else 0
+        print(
+            f"{case['rows']} rows: {speedup:.2f}x rows/sec vs baseline, "
+            f"p50 {base['latency_ms']['p50']}ms -> {case['latency_ms']['p50']}ms"
+        )
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark WebAutomator against a local test site")
+    parser.add_argument("--rows", default="100,1000,10000", help="Comma-separated row counts to run")
+    parser.add_argument("--fields", type=int, default=10, help="Number of form fields")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency per request in seconds")
+    parser.add_argument("--alerts", action="store_true", help="Show an alert after each submission")
+    parser.add_argument("--ajax", action="store_true", help="Submit the form with jQuery.ajax instead of a page load")
+    parser.add_argument("--fill-mode", choices=["keys", "js"], default="keys", help="Fill mode for all fields")
+    parser.add_argument("--workers", type=int, default=1, help="Parallel browser sessions")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    parser.add_argument("--verbose", action="store_true", help="Print automation status messages")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = BenchmarkServer(args.fields, args.latency, args.alerts, args.ajax).start()
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for rows in [int(count) for count in args.rows.split(",") if count.strip()]:
+                case = run_case(server, rows, args, work_dir)
+                print(
+                    f"{rows} rows: {case['rows_per_sec']} rows/sec, p50 {case['latency_ms']['p50']}ms, "
+                    f"p95 {case['latency_ms']['p95']}ms, failed {case['failed']}, "
+                    f"browser RSS {format_mb(case['peak_rss_mb']['browser'])}"
+                )
+                results.append(case)
+    finally:
+        server.stop()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "scenario": {
+            "fields": args.fields,
+            "latency": args.latency,
+            "alerts": args.alerts,
+            "ajax": args.ajax,
+            "fill_mode": args.fill_mode,
+            "workers": args.workers
+        },
+        "results": results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results saved to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+import argparse
+import signal
+import sys
+from web_automation import WebAutomator
+from excel_handler import ExcelHandler
+from dead_letter import load_dead_letters
+from run_journal import RunJournal
+from config_manager import ConfigManager
+from settings_manager import SettingsManager
+from progress_sink import ConsoleProgressSink
+from shard_runner import ShardRunner, expand_shards
+
+# Process exit codes, for schedulers and scripts
+EXIT_OK = 0
+EXIT_ERROR = 1  # The run could not start or did not get through every row
+EXIT_ROWS_FAILED = 2  # Every row was handled but some failed
+
+def exit_code(finished, failed_rows):
+    if not finished:
+        return EXIT_ERROR
+    return EXIT_ROWS_FAILED if failed_rows else EXIT_OK
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a saved LazyWorker configuration without the GUI",
+        epilog="Exit status: 0 when every row succeeded or was skipped, 1 when the run failed or "
+               "stopped early, 2 when it finished but some rows failed."
+    )
+    parser.add_argument("--config", required=True, help="Saved configuration name (from the configs folder)")
+    parser.add_argument("--excel", help="Data file to process: Excel, CSV, TSV, JSON Lines or Parquet (defaults to the file saved in the configuration)")
+    parser.add_argument("--sheet", help="Sheet name (defaults to the saved sheet, then the first sheet)")
+    parser.add_argument("--workers", type=int, help="Number of parallel browser sessions")
+    parser.add_argument("--json", action="store_true", help="Write progress as JSON lines")
+    parser.add_argument("--show-browser", action="store_true", help="Run Chrome with a visible window")
+    parser.add_argument("--rerun-failed", metavar="CSV", help="Process only the rows in a failed-rows file")
+    parser.add_argument(
+        "--shard", action="append", metavar="FILE[@SHEET]",
+        help="Workbook (and sheet) to run in its own process; repeat to run several at once"
+    )
+    parser.add_argument("--all-sheets", action="store_true", help="With --shard, run every sheet of each workbook")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    sink = ConsoleProgressSink(json_lines=args.json)
+    
+    config = ConfigManager().load_config(args.config)
+    if config is None:
+        sink.update_status(f"Configuration not found: {args.config}")
+        return EXIT_ERROR
+    
+    settings = SettingsManager().settings.copy()
+    settings['headless'] = 0 if args.show_browser else 1
+    if args.workers:
+        settings['worker_count'] = args.workers
+    
+    def handle_interrupt(signum, frame):
+        if sink.stop_flag:
+            raise KeyboardInterrupt
+        sink.stop_flag = True
+        sink.update_status("Stopping automation...")
+    signal.signal(signal.SIGINT, handle_interrupt)
+    
+    if args.shard:
+        sources = []
+        for source in args.shard:
+            workbook, _, sheet = source.rpartition("@") if "@" in source else (source, "", "")
+            sources.append((workbook, sheet or args.sheet))
+        try:
+            shards = expand_shards(sources, config, all_sheets=args.all_sheets)
+        except Exception as e:
+            sink.update_status(str(e))
+            return EXIT_ERROR
+        report = ShardRunner(shards, settings, sink).run()
+        return exit_code(
+            all(shard.get('finished') and not shard.get('error') for shard in report['shards']),
+            report['totals']['failed']
+        )
+    
+    excel_path = args.excel or config.get('excel_file')
+    if not excel_path:
+        sink.update_status("No Excel file given")
+        return EXIT_ERROR
+    config['excel_file'] = excel_path
+    if args.sheet:
+        config['excel_sheet'] = args.sheet
+    config.setdefault('excel_sheet', None)
+    
+    automator = WebAutomator(config, sink, settings)
+    try:
+        if args.rerun_failed:
+            data = load_dead_letters(args.rerun_failed)
+        else:
+            data = ExcelHandler(excel_path, disk_cache=bool(settings.get('disk_cache', 1))).get_rows(
+                config['excel_sheet'],
+                stream=bool(settings.get('stream_excel', 1)),
+                columns=automator.transforms.required_columns
+            )
+    except Exception as e:
+        sink.update_status(str(e))
+        return EXIT_ERROR
+    
+    sink.update_status("Automation started.")
+    automator.run_automation(data)
+    return exit_code(automator.finished, automator.outcomes.as_dict()[RunJournal.FAILED])
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import json
 import os
 from datetime import datetime
+from data_sources import is_supported
 
 class ConfigManager:
     def __init__(self):
@@ -55,8 +56,11 @@ class ConfigManager:
         gui.password_entry.delete(0, 'end')
         gui.password_entry.insert(0, config['password'])
         
-        # Handle Excel file path
+        # Handle data file path (Excel, CSV, TSV, JSON Lines or Parquet)
         excel_path = config.get('excel_file', '')
+        if excel_path and not is_supported(excel_path):
+            gui.update_status(f"Unsupported data file in configuration: {excel_path}")
+            excel_path = ''
         if excel_path:
             # Update display path
             display_path = excel_path
@@ -65,6 +69,7 @@ class ConfigManager:
             gui.file_path.set(display_path)
             # Store full path
             gui.file_path_label.full_path = excel_path
+        gui.selected_sheet = config.get('excel_sheet')
         
         # Clear existing mappings in tree
         for item in gui.mapping_tree.get_children():
@@ -75,7 +80,9 @@ class ConfigManager:
             gui.mapping_tree.insert("", "end", values=(
                 mapping['excel_column'],
                 mapping.get('selector_type', 'CSS'),  # Default to CSS for backward compatibility
-                mapping['web_selector']
+                mapping['web_selector'],
+                mapping.get('fill_mode', 'keys'),
+                json.dumps(mapping['transform']) if mapping.get('transform') else ""
             ))
             
         # Clear existing actions in tree
@@ -96,3 +103,12 @@ class ConfigManager:
         # Update auto confirm setting if present
         if 'auto_confirm' in config:
             gui.auto_confirm.set(config['auto_confirm'])
+        
+        gui.submit_mode.set(config.get('submit_mode', 'dom'))
+        gui.replay_success_entry.delete(0, 'end')
+        gui.replay_success_entry.insert(0, config.get('replay_success_text', ''))
+        gui.blocked_urls_entry.delete(0, 'end')
+        gui.blocked_urls_entry.insert(0, ", ".join(config.get('blocked_urls', [])))
+        gui.confirmation_type.set(config.get('confirmation_selector_type', 'CSS'))
+        gui.confirmation_entry.delete(0, 'end')
+        gui.confirmation_entry.insert(0, config.get('confirmation_selector', ''))
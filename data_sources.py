@@ -0,0 +1,192 @@
+import csv
+import json
+import os
+import pandas as pd
+from row_store import record_type
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional
+    pq = None
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xls')
+
+def make_column_names(header):
+    """Name header cells the same way pandas does (Unnamed: n, duplicates as Name.1)"""
+    columns = []
+    seen = {}
+    for position, value in enumerate(header):
+        name = f"Unnamed: {position}" if value is None or value == "" else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        columns.append(name)
+    return columns
+
+def cell_text(value):
+    """A cell as the text typed into the form"""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+class DataSource:
+    """A file of rows other than an Excel workbook, read lazily as text.
+
+    Subclasses implement _read(), a generator yielding the header and then each row as a
+    list of strings. Such files have a single table, reported as one sheet named after
+    the file.
+    """
+    extensions = ()
+    skip_blank = True  # Rows with every cell empty are skipped, like blank rows in a sheet
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.sheet_name = os.path.splitext(os.path.basename(filepath))[0]
+
+    def check(self):
+        """Raise if the file can't be read on this system"""
+
+    def _read(self, columns=None):
+        """Header, then rows; columns is a hint that sources able to skip columns may use"""
+        raise NotImplementedError
+
+    def read_columns(self):
+        rows = self._read()
+        try:
+            header = next(rows, None)
+        finally:
+            rows.close()
+        if header is None:
+            raise ValueError(f"No data found in {os.path.basename(self.filepath)}")
+        return make_column_names(header)
+
+    def count_rows(self):
+        rows = self._read()
+        try:
+            next(rows, None)
+            return sum(1 for values in rows if any(values) or not self.skip_blank)
+        finally:
+            rows.close()
+
+    def iter_rows(self, columns=None):
+        """(index, row) pairs: dicts of every column, or Records of the given columns"""
+        rows = self._read(columns)
+        try:
+            header = next(rows, None)
+            if header is None:
+                raise ValueError(f"No data found in {os.path.basename(self.filepath)}")
+            names = make_column_names(header)
+            width = len(names)
+            if columns is not None:
+                positions = {name: position for position, name in enumerate(names)}
+                picks = [positions[column] for column in columns if column in positions]
+                make = record_type([names[position] for position in picks])
+
+            for index, values in enumerate(rows):
+                if self.skip_blank and not any(values):
+                    continue
+                if columns is not None:
+                    yield index, make(tuple(values[position] if position < len(values) else '' for position in picks))
+                    continue
+                cells = list(values[:width])
+                cells.extend([''] * (width - len(cells)))
+                yield index, dict(zip(names, cells))
+        finally:
+            rows.close()
+
+    def read_frame(self, columns=None):
+        """DataFrame of the given columns (those the file has), or of every column"""
+        available = self.read_columns()
+        names = available if columns is None else [column for column in columns if column in available]
+        index = []
+        values = []
+        for row_index, record in self.iter_rows(names):
+            index.append(row_index)
+            values.append(record.values)
+        return pd.DataFrame(values, index=index, columns=names, dtype=object)
+
+class CsvSource(DataSource):
+    extensions = ('.csv',)
+    delimiter = ','
+
+    def _read(self, columns=None):
+        # utf-8-sig drops the byte order mark Excel puts at the start of saved CSVs
+        with open(self.filepath, newline='', encoding='utf-8-sig') as f:
+            yield from csv.reader(f, delimiter=self.delimiter)
+
+class TsvSource(CsvSource):
+    extensions = ('.tsv',)
+    delimiter = '\t'
+
+class JsonLinesSource(DataSource):
+    """One JSON object per line; the columns are the keys of the first object"""
+    extensions = ('.jsonl', '.ndjson')
+
+    def _read(self, columns=None):
+        with open(self.filepath, encoding='utf-8-sig') as f:
+            keys = None
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    if keys is not None:
+                        yield []
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+                if not isinstance(record, dict):
+                    raise ValueError(f"Line {line_number} is not a JSON object")
+                if keys is None:
+                    keys = list(record)
+                    yield keys
+                yield [cell_text(record.get(key)) for key in keys]
+
+class ParquetSource(DataSource):
+    """Parquet read in record batches; only the requested columns are decoded"""
+    extensions = ('.parquet',)
+    skip_blank = False  # Row counts come from the file metadata, so every row is kept
+    batch_size = 1000
+
+    def check(self):
+        if pq is None:
+            raise ValueError("Reading Parquet files needs pyarrow (pip install pyarrow)")
+
+    def count_rows(self):
+        self.check()
+        return pq.ParquetFile(self.filepath).metadata.num_rows
+
+    def _read(self, columns=None):
+        self.check()
+        parquet = pq.ParquetFile(self.filepath)
+        names = list(parquet.schema_arrow.names)
+        if columns is not None:
+            names = [name for name in names if name in set(columns)]
+        yield names
+        if not names:
+            yield from ([] for _ in range(parquet.metadata.num_rows))
+            return
+        for batch in parquet.iter_batches(batch_size=self.batch_size, columns=names):
+            cells = [column.to_pylist() for column in batch.columns]
+            for values in zip(*cells):
+                yield [cell_text(value) for value in values]
+
+SOURCE_TYPES = (CsvSource, TsvSource, JsonLinesSource, ParquetSource)
+SUPPORTED_EXTENSIONS = EXCEL_EXTENSIONS + tuple(
+    extension for source in SOURCE_TYPES for extension in source.extensions
+)
+
+def is_supported(filepath):
+    return filepath.lower().endswith(SUPPORTED_EXTENSIONS)
+
+def open_source(filepath):
+    """DataSource for a non-Excel file, None for workbooks and unknown types"""
+    lower = (filepath or "").lower()
+    for source in SOURCE_TYPES:
+        if lower.endswith(source.extensions):
+            return source(filepath)
+    return None
@@ -0,0 +1,62 @@
+import csv
+import os
+import threading
+from datetime import datetime
+import pandas as pd
+from transforms import DERIVED_PREFIX
+
+# Columns written ahead of the row's own values
+META_COLUMNS = ["_row", "_status", "_step", "_selector", "_error_class", "_error"]
+
+class DeadLetterWriter:
+    """CSV of failed and skipped rows, written as the run goes, that can be run again on its own"""
+    def __init__(self, config, output_dir="dead_letters"):
+        excel_name = os.path.splitext(os.path.basename(config.get('excel_file', '')))[0] or "rows"
+        sheet = config.get('excel_sheet')
+        name = f"{excel_name}_{sheet}" if sheet else excel_name
+        self.path = os.path.join(output_dir, f"{name}_failed_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+        self.lock = threading.Lock()  # Shared by parallel workers
+        self.file = None
+        self.writer = None
+        self.columns = None
+        self.count = 0
+
+    def write(self, index, row, row_result):
+        """Append one row with how it ended; the file is created on the first failure"""
+        values = row.to_dict() if hasattr(row, 'to_dict') else dict(row)
+        # Transformed values are recomputed on a re-run, so only the source columns are kept
+        values = {column: value for column, value in values.items() if not str(column).startswith(DERIVED_PREFIX)}
+        record = {
+            "_row": index,
+            "_status": row_result['status'],
+            "_step": row_result.get('step', ''),
+            "_selector": row_result.get('selector', ''),
+            "_error_class": row_result.get('error_class', ''),
+            "_error": row_result.get('reason', '')
+        }
+        with self.lock:
+            if self.writer is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                # utf-8-sig so Excel opens the file with the right encoding
+                self.file = open(self.path, 'w', newline='', encoding='utf-8-sig')
+                self.columns = META_COLUMNS + [column for column in values if column not in META_COLUMNS]
+                self.writer = csv.DictWriter(self.file, fieldnames=self.columns, extrasaction='ignore')
+                self.writer.writeheader()
+            self.writer.writerow({**values, **record})
+            self.file.flush()  # Keep the file complete if the app is killed mid-run
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file:
+                self.file.close()
+                self.file = None
+
+def load_dead_letters(path):
+    """Rows of a dead-letter file, indexed by their original row numbers, without the outcome columns"""
+    data = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+    if "_row" not in data.columns:
+        raise ValueError(f"Not a failed-rows file: {path}")
+    data.index = data["_row"].astype(int)
+    data.index.name = None
+    return data.drop(columns=[column for column in META_COLUMNS if column in data.columns])
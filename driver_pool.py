@@ -0,0 +1,181 @@
+import os
+import queue
+import threading
+
+try:
+    import psutil
+except ImportError:  # Optional; without it process memory is read from /proc where there is one
+    psutil = None
+
+# Run on the job's last page before it is left, since storage belongs to that page's origin
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+def _proc_children():
+    """Parent pid -> child pids, from /proc"""
+    children = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", 'rb') as f:
+                # The command name can hold spaces and brackets, so fields are counted from its end
+                fields = f.read().rsplit(b")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(name))
+    return children
+
+def _proc_rss(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def process_tree_mb(pid):
+    """Resident memory of a process and all its descendants in MB, or 0 if it can't be read"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return 0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass  # Exited while being counted
+        return total / (1024 * 1024)
+    if not os.path.isdir("/proc"):
+        return 0
+    children = _proc_children()
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        total += _proc_rss(current)
+        pending.extend(children.get(current, ()))
+    return total / (1024 * 1024)
+
+class DriverPool:
+    """Pre-launched Chrome sessions handed out to runs, health-checked and recycled"""
+    def __init__(self, factory, size, max_rows=0, max_memory_mb=0):
+        self.factory = factory  # Callable returning a new, configured driver
+        self.size = size
+        self.max_rows = max_rows
+        self.max_memory_mb = max_memory_mb
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.rows_served = {}
+        self.pending = 0  # Drivers being launched in the background
+        self.closed = False
+    
+    def warm_up(self):
+        """Launch drivers in the background until the pool holds `size` sessions"""
+        with self.lock:
+            missing = self.size - self.idle.qsize() - self.pending
+        for _ in range(missing):
+            self._spawn_async()
+    
+    def _spawn_async(self):
+        with self.lock:
+            self.pending += 1
+        thread = threading.Thread(target=self._spawn)
+        thread.daemon = True
+        thread.start()
+    
+    def _spawn(self):
+        try:
+            driver = self.factory()
+        except Exception:
+            return  # Next acquire() falls back to launching its own driver
+        finally:
+            with self.lock:
+                self.pending -= 1
+        if self.closed:
+            self._quit(driver)
+        else:
+            self.idle.put(driver)
+    
+    def _quit(self, driver):
+        with self.lock:
+            self.rows_served.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def is_healthy(self, driver):
+        try:
+            return driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+    
+    def memory_mb(self, driver):
+        """Resident memory of the driver's Chrome (browser, renderer and GPU processes) in MB.
+
+        Summed over chromedriver's process tree with psutil, or /proc without it; 0 when
+        neither is available, which turns the memory limit off.
+        """
+        try:
+            pid = driver.service.process.pid
+        except AttributeError:
+            return 0
+        try:
+            return process_tree_mb(pid)
+        except Exception:
+            return 0
+    
+    def acquire(self):
+        """Hand out a healthy warm driver, launching one directly if none is ready"""
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                driver = self.factory()
+                break
+            if self.is_healthy(driver):
+                break
+            self._quit(driver)
+        
+        self.warm_up()  # Keep the pool topped up for the next job
+        return driver
+    
+    def count_row(self, driver):
+        with self.lock:
+            self.rows_served[id(driver)] = self.rows_served.get(id(driver), 0) + 1
+    
+    def needs_recycle(self, driver):
+        """True once a driver has served max_rows rows or its memory passed the threshold"""
+        with self.lock:
+            rows = self.rows_served.get(id(driver), 0)
+        if self.max_rows and rows >= self.max_rows:
+            return True
+        return bool(self.max_memory_mb) and self.memory_mb(driver) > self.max_memory_mb
+    
+    def release(self, driver):
+        """Return a driver after a job, or retire it if it is worn out or broken"""
+        if self.closed or self.idle.qsize() >= self.size or not self.is_healthy(driver) or self.needs_recycle(driver):
+            self._quit(driver)
+            return
+        try:
+            # Drop the previous job's storage, page and cookies before the next job gets it
+            driver.execute_script(CLEAR_STORAGE_SCRIPT)
+            driver.get("about:blank")
+            driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        except Exception:
+            self._quit(driver)
+            return
+        self.idle.put(driver)
+    
+    def shutdown(self):
+        self.closed = True
+        while True:
+            try:
+                self._quit(self.idle.get_nowait())
+            except queue.Empty:
+                break
@@ -1,10 +1,59 @@
 import pandas as pd
 import os
+import threading
+from collections import OrderedDict
 from openpyxl import load_workbook
+from row_store import record_type
+from data_sources import open_source, make_column_names, SUPPORTED_EXTENSIONS
+from workbook_cache import workbook_cache, CachedRowStream
+
+class DatasetCache:
+    """Process-wide cache of parsed sheets, keyed by file path, size, mtime and sheet"""
+    def __init__(self, max_entries=8):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(filepath, sheet_name, kind):
+        stat = os.stat(filepath)
+        # A changed file gets a new key, so stale entries are never returned
+        return (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns, sheet_name, kind)
+    
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            return None
+    
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+dataset_cache = DatasetCache()
+
+def drop_blank_rows(frame):
+    """Frame without rows whose every cell is empty, keeping the other rows' index.
+
+    iter_rows and the other data sources skip such rows, so every path yields the same rows
+    under the same indexes.
+    """
+    blank = (frame == "").all(axis=1)
+    return frame[~blank] if blank.any() else frame
 
 class ExcelHandler:
-    def __init__(self, filepath):
+    def __init__(self, filepath, disk_cache=False):
         self.filepath = filepath
+        self.disk_cache = disk_cache  # Keep parsed sheets in the on-disk workbook cache
+        self.source = open_source(filepath)  # Reader for CSV, TSV, JSON Lines and Parquet; None for workbooks
         self.data = None
         self.sheet_name = None
         self.workbook = None
@@ -12,18 +61,27 @@ class ExcelHandler:
         self.chunk_size = 1000  # For batch processing
         
     def validate_file(self):
-        """Validate Excel file existence and format"""
+        """Validate data file existence and format"""
         if not self.filepath:
             raise ValueError("No Excel file selected")
         
         if not os.path.exists(self.filepath):
             raise FileNotFoundError(f"Excel file not found: {self.filepath}")
             
-        if not self.filepath.endswith(('.xlsx', '.xls')):
-            raise ValueError("File must be an Excel file (.xlsx or .xls)")
+        if not self.filepath.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise ValueError(f"File must be one of: {', '.join(SUPPORTED_EXTENSIONS)}")
+        if self.source:
+            self.source.check()
+    
+    @property
+    def streamable(self):
+        """True if rows can be read lazily: .xlsx workbooks and every other data source"""
+        return self.source is not None or self.filepath.lower().endswith('.xlsx')
     
     def get_sheet_names(self):
-        """Get list of sheet names from Excel file"""
+        """Get list of sheet names from Excel file; other files have a single sheet named after the file"""
+        if self.source:
+            return [self.source.sheet_name]
         try:
             self.workbook = load_workbook(self.filepath, read_only=True)
             return self.workbook.sheetnames
@@ -33,38 +91,86 @@ class ExcelHandler:
             if self.workbook:
                 self.workbook.close()
     
-    def get_data(self, sheet_name=None):
-        """Optimized data loading with memory efficiency"""
+    def get_data(self, sheet_name=None, columns=None):
+        """Optimized data loading with memory efficiency; columns limits the load to those columns"""
         try:
             self.validate_file()
             
             # Use cached data if available
-            if self.data is not None and self.sheet_name == sheet_name:
+            if self.data is not None and self.sheet_name == sheet_name and columns is None:
+                return self.data
+            
+            cache_key = dataset_cache.make_key(self.filepath, sheet_name, "data")
+            cached = dataset_cache.get(cache_key)
+            if cached is not None:
+                self.sheet_name, self.data = cached
+                self._column_cache[self.sheet_name] = list(self.data.columns)
+                if columns is not None:
+                    # The whole sheet is already parsed, so narrowing it is cheap
+                    return self.data[[column for column in columns if column in self.data.columns]]
                 return self.data
             
+            if columns is not None:
+                cache_key = dataset_cache.make_key(self.filepath, sheet_name, ("data", tuple(columns)))
+                cached = dataset_cache.get(cache_key)
+                if cached is not None:
+                    self.sheet_name, data = cached
+                    return data
+            
+            # A sheet parsed in an earlier session is memory-mapped from the disk cache
+            sheet = self._cached_sheet(sheet_name)
+            if sheet is not None:
+                data = sheet.frame(columns)
+                dataset_cache.put(cache_key, (self.sheet_name, data))
+                if columns is None:
+                    self.data = data
+                return data
+            
             sheets = self.get_sheet_names()
             if not sheets:
                 raise ValueError("Excel file contains no sheets")
             
             self.sheet_name = sheet_name if sheet_name in sheets else sheets[0]
+            # Taken before parsing, so an edit made meanwhile isn't cached under the new version
+            version = workbook_cache.file_version(self.filepath) if self.disk_cache else None
             
-            # Read Excel with optimized settings
-            self.data = pd.read_excel(
-                self.filepath,
-                sheet_name=self.sheet_name,
-                dtype=str,  # Convert all columns to string
-                engine='openpyxl',  # Use openpyxl engine
-                na_filter=False  # Don't interpret anything as NaN
-            )
-            
-            # Clean data
-            self.data = self.data.fillna('')
-            self.data = self.data.astype(str)
+            # Read Excel with optimized settings. With dtype=str and na_filter off every
+            # cell is already a string, so no fillna/astype copies are needed afterwards.
+            # The disk cache needs every column, the parse costs the same either way.
+            full = columns is None or self.disk_cache
+            if self.source:
+                data = self.source.read_frame(None if full else columns)
+            elif not full and self.streamable:
+                # Whether a row is blank depends on cells outside the wanted columns too,
+                # so the narrow load goes through the same reader as streaming
+                data = self._read_frame(columns)
+            else:
+                # .xls sheets are small enough to read whole; they're narrowed below
+                data = drop_blank_rows(pd.read_excel(
+                    self.filepath,
+                    sheet_name=self.sheet_name,
+                    dtype=str,  # Convert all columns to string
+                    engine='openpyxl',  # Use openpyxl engine
+                    na_filter=False  # Don't interpret anything as NaN
+                ))
             
-            if self.data.empty:
+            if data.empty:
                 raise ValueError(f"No data found in sheet: {self.sheet_name}")
             
+            if self.disk_cache:
+                # Blank rows are already dropped, so the cache holds the same rows as a streamed fill
+                workbook_cache.store(
+                    self.filepath, sheet_name, self.sheet_name, list(data.columns),
+                    zip(data.index.tolist(), data.itertuples(index=False, name=None)), version
+                )
+            if columns is not None:
+                data = data[[column for column in columns if column in data.columns]]
+                dataset_cache.put(cache_key, (self.sheet_name, data))
+                return data
+            
             # Cache column names
+            dataset_cache.put(cache_key, (self.sheet_name, data))
+            self.data = data
             self._column_cache[self.sheet_name] = list(self.data.columns)
             
             return self.data
@@ -72,8 +178,185 @@ class ExcelHandler:
         except Exception as e:
             raise Exception(f"Error loading Excel data: {str(e)}")
     
+    def _read_frame(self, columns):
+        """DataFrame of the given columns built from iter_rows, which skips blank rows"""
+        index = []
+        values = []
+        for row_index, record in self.iter_rows(self.sheet_name, columns):
+            index.append(row_index)
+            values.append(record.values)
+        names = self._column_cache.get(self.sheet_name, [])
+        return pd.DataFrame(
+            values, index=index, columns=[column for column in columns if column in names], dtype=object
+        )
+    
     def get_column_names(self):
         """Get list of column names from current data"""
         if self.data is not None:
             return list(self.data.columns)
+        if self.sheet_name in self._column_cache:
+            return list(self._column_cache[self.sheet_name])
         return []
+    
+    def stream_rows(self, sheet_name=None):
+        """Row stream that reads the sheet lazily instead of loading it into a DataFrame"""
+        self.validate_file()
+        if not self.streamable:
+            raise ValueError("Streaming is not supported for .xls files")
+        return ExcelRowStream(self, sheet_name)
+    
+    def get_rows(self, sheet_name=None, stream=False, columns=None):
+        """Rows for an automation run: a lazy stream when requested and possible, else the DataFrame.
+
+        columns, when given, keeps only those columns (the ones the mappings read).
+        """
+        if stream and self.streamable:
+            self.validate_file()
+            sheet = self._cached_sheet(sheet_name)
+            if sheet is not None:
+                rows = CachedRowStream(sheet, chunk_size=self.chunk_size)
+            else:
+                rows = self.stream_rows(sheet_name)
+                if self.disk_cache:
+                    # Streaming never holds the whole sheet, so the cache is filled by a second reader
+                    workbook_cache.build_in_background(self, sheet_name)
+            return rows if columns is None else rows.select(columns)
+        return self.get_data(sheet_name, columns)
+    
+    def _cached_sheet(self, sheet_name):
+        """Sheet from the disk cache when it's enabled and holds this version of the file"""
+        if not self.disk_cache:
+            return None
+        sheet = workbook_cache.load(self.filepath, sheet_name)
+        if sheet is not None:
+            self.sheet_name = sheet.sheet_name
+            self._column_cache[self.sheet_name] = list(sheet.columns)
+        return sheet
+    
+    def _open_sheet(self, workbook, sheet_name):
+        sheets = workbook.sheetnames
+        if not sheets:
+            raise ValueError("Excel file contains no sheets")
+        self.sheet_name = sheet_name if sheet_name in sheets else sheets[0]
+        return workbook[self.sheet_name]
+    
+    def count_rows(self, sheet_name=None):
+        """Number of data rows, taken from the sheet dimensions when available.
+
+        For workbooks this is an estimate: the dimensions include blank rows, which
+        iter_rows skips, so a run may yield fewer rows than counted.
+        """
+        cache_key = dataset_cache.make_key(self.filepath, sheet_name, "count")
+        cached = dataset_cache.get(cache_key)
+        if cached is not None:
+            self.sheet_name, count = cached
+            return count
+        
+        if self.source:
+            self.sheet_name = self.source.sheet_name
+            count = self.source.count_rows()
+            dataset_cache.put(cache_key, (self.sheet_name, count))
+            return count
+        
+        workbook = load_workbook(self.filepath, read_only=True)
+        try:
+            sheet = self._open_sheet(workbook, sheet_name)
+            if sheet.max_row is None:
+                # Dimensions missing from the file, count rows instead
+                rows = sheet.iter_rows(values_only=True)
+                next(rows, None)  # Header
+                count = sum(1 for values in rows if any(value is not None for value in values))
+            else:
+                count = max(sheet.max_row - 1, 0)
+        finally:
+            workbook.close()
+        dataset_cache.put(cache_key, (self.sheet_name, count))
+        return count
+    
+    def read_column_names(self, sheet_name=None):
+        """Column names from the header row only, without parsing the rest of the sheet"""
+        cache_key = dataset_cache.make_key(self.filepath, sheet_name, "columns")
+        cached = dataset_cache.get(cache_key)
+        if cached is None:
+            for _ in self.iter_rows(sheet_name):
+                break
+            cached = (self.sheet_name, self._column_cache.get(self.sheet_name, []))
+            dataset_cache.put(cache_key, cached)
+        self.sheet_name, columns = cached
+        self._column_cache[self.sheet_name] = columns
+        return list(columns)
+    
+    def iter_rows(self, sheet_name=None, columns=None):
+        """Yield (index, row) pairs one at a time using openpyxl's read-only mode.
+
+        Rows are dicts of every column, or with columns given, Records of just those columns.
+        """
+        if self.source:
+            self.sheet_name = self.source.sheet_name
+            self._column_cache[self.sheet_name] = self.source.read_columns()
+            yield from self.source.iter_rows(columns)
+            return
+        workbook = load_workbook(self.filepath, read_only=True, data_only=True)
+        try:
+            rows = self._open_sheet(workbook, sheet_name).iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise ValueError(f"No data found in sheet: {self.sheet_name}")
+            selected = columns
+            columns = make_column_names(header)
+            self._column_cache[self.sheet_name] = columns
+            width = len(columns)
+            
+            if selected is not None:
+                positions = {column: position for position, column in enumerate(columns)}
+                picks = [positions[column] for column in selected if column in positions]
+                make = record_type([columns[position] for position in picks])
+            
+            for index, values in enumerate(rows):
+                if all(value is None for value in values):
+                    continue  # Blank row
+                if selected is not None:
+                    # Only the picked cells are converted; the rest of the row is never touched
+                    yield index, make(tuple(
+                        '' if position >= len(values) or values[position] is None else str(values[position])
+                        for position in picks
+                    ))
+                    continue
+                cells = ['' if value is None else str(value) for value in values[:width]]
+                cells.extend([''] * (width - len(cells)))
+                yield index, dict(zip(columns, cells))
+        finally:
+            workbook.close()
+
+class ExcelRowStream:
+    """Lazy stand-in for a DataFrame: supports len(), .empty and .iterrows()"""
+    def __init__(self, handler, sheet_name=None, selected=None):
+        self.handler = handler
+        self.sheet_name = sheet_name
+        self.selected = selected  # Columns to keep, None for all
+        self._row_count = None
+    
+    def __len__(self):
+        if self._row_count is None:
+            self._row_count = self.handler.count_rows(self.sheet_name)
+        return self._row_count
+    
+    @property
+    def empty(self):
+        return len(self) == 0
+    
+    @property
+    def columns(self):
+        columns = self.handler.read_column_names(self.sheet_name)
+        if self.selected is None:
+            return columns
+        return [column for column in self.selected if column in columns]
+    
+    def select(self, columns):
+        """Stream of only the given columns, yielding compact Records instead of dicts"""
+        stream = ExcelRowStream(self.handler, self.sheet_name, list(columns))
+        stream._row_count = self._row_count
+        return stream
+    
+    def iterrows(self):
+        return self.handler.iter_rows(self.sheet_name, self.selected)
@@ -0,0 +1,63 @@
+# Finds every locator in one round trip. Elements that are missing or not rendered come
+# back as null so the caller can fall back to a regular visibility wait for them.
+# Pass false as the second argument to accept elements that exist but are hidden.
+LOCATE_SCRIPT = """
+var locators = arguments[0], visibleOnly = arguments[1] !== false;
+var found = [];
+for (var i = 0; i < locators.length; i++) {
+    var type = locators[i][0], selector = locators[i][1], element = null;
+    try {
+        if (type === 'ID') {
+            element = document.getElementById(selector);
+        } else if (type === 'XPATH') {
+            element = document.evaluate(selector, document, null,
+                XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else {
+            element = document.querySelector(selector);
+        }
+    } catch (e) {
+        element = null;
+    }
+    if (element && visibleOnly && !(element.offsetWidth || element.offsetHeight || element.getClientRects().length)) {
+        element = null;
+    }
+    found.push(element);
+}
+return found;
+"""
+
+class LocatorCache:
+    """Mapped field locators compiled once per run and resolved in one batch per page load"""
+    def __init__(self, automator, mappings):
+        self.automator = automator
+        self.locators = []
+        for mapping in mappings:
+            selector_type = str(mapping.get('selector_type', 'CSS')).upper()
+            if selector_type not in ("CSS", "ID", "XPATH"):
+                selector_type = "CSS"  # Same fallback as get_by_type
+            self.locators.append((selector_type, mapping['web_selector']))
+        self.by_types = [automator.get_by_type(selector_type) for selector_type, _ in self.locators]
+        self.skip = set()  # Positions found dead by the preflight check, never waited for
+    
+    def find_all(self, visible_only=True):
+        """Look up every field on the current page in a single script call"""
+        if not self.locators:
+            return []
+        elements = self.automator.driver.execute_script(LOCATE_SCRIPT, self.locators, visible_only)
+        return list(elements or [None] * len(self.locators))
+    
+    def resolve(self):
+        """One element (or None) per mapping, waiting only for fields not found right away"""
+        elements = self.find_all()
+        for position, element in enumerate(elements):
+            if element is None and position not in self.skip:
+                _, selector = self.locators[position]
+                elements[position] = self.automator.wait_for_element(self.by_types[position], selector)
+        return elements
+    
+    def missing(self):
+        """Selectors of mapped fields that are not currently on the page"""
+        return [
+            selector for (_, selector), element in zip(self.locators, self.find_all())
+            if element is None
+        ]
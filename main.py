@@ -1,18 +1,24 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, simpledialog
 import json
-import time
-from web_automation import WebAutomator
+from web_automation import WebAutomator, create_driver
+from driver_pool import DriverPool
+from transforms import TransformPipeline
 from excel_handler import ExcelHandler
+from data_sources import SUPPORTED_EXTENSIONS
+from dead_letter import load_dead_letters
 from config_manager import ConfigManager
 from splash_screen import SplashScreen
 from welcome_screen import WelcomeScreen
 from settings_manager import SettingsManager
+from status_bus import StatusBus
 
 class LazyWorkerGUI:
     VERSION = "1.0.0"
     AUTHOR = "Arjuna Panji Prakarsa"
     WEBSITE = "https://arjunaprakarsa.com"
+    STATUS_POLL_MS = 100  # How often the Tk loop drains the status bus
+    MAX_LOG_LINES = 1000  # Status log keeps only the most recent lines
 
     def __init__(self, welcome_screen=None):
         self.welcome_screen = welcome_screen
@@ -27,10 +33,11 @@ class LazyWorkerGUI:
         self.stop_flag = False
         self.automation_running = False
         self.paused = False
+        self.selected_sheet = None
+        self.driver_pool = None
+        self.driver_pool_options = None
         
-        self.update_queue = []  # Queue for status updates
-        self.last_update = time.time()
-        self.update_interval = 0.1  # Seconds between status updates
+        self.status_bus = StatusBus()  # Worker threads post here, the Tk loop applies it
         
         # Create main scrollable frame
         self.main_frame = ttk.Frame(self.root)
@@ -39,6 +46,29 @@ class LazyWorkerGUI:
         self.create_widgets()
         self.create_status_bar()
         self.add_tooltips()
+        self.get_driver_pool()  # Start warming Chrome sessions early
+        self._status_job = self.root.after(self.STATUS_POLL_MS, self._poll_status_bus)
+    
+    def get_driver_pool(self):
+        """Warm Chrome sessions shared by runs, or None when pooling is disabled"""
+        settings = self.settings_manager.settings
+        size = int(settings.get('driver_pool_size', 0))
+        if size <= 0:
+            return None
+        # Warm sessions were launched with the old options, so a profile change needs a new pool
+        launch_options = (size, settings.get('chrome_profile', 'default'), settings.get('headless', 0))
+        if self.driver_pool is None or self.driver_pool_options != launch_options:
+            self.driver_pool_options = launch_options
+            if self.driver_pool:
+                self.driver_pool.shutdown()
+            self.driver_pool = DriverPool(
+                lambda: create_driver(self.settings_manager.settings),
+                size,
+                max_rows=int(settings.get('driver_recycle_rows', 0)),
+                max_memory_mb=settings.get('driver_max_memory_mb', 0)
+            )
+        self.driver_pool.warm_up()
+        return self.driver_pool
     
     def create_widgets(self):
         # Add version and author info at top
@@ -127,6 +157,23 @@ class LazyWorkerGUI:
         
         ttk.Button(file_frame, text="Browse", command=self.select_file).pack(side="left")
 
+        # Extra URL patterns Chrome should not load for this site
+        blocked_frame = ttk.Frame(basic_frame)
+        blocked_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Label(blocked_frame, text="Blocked URLs:").pack(side="left")
+        self.blocked_urls_entry = ttk.Entry(blocked_frame)
+        self.blocked_urls_entry.pack(side="left", fill="x", expand=True, padx=5)
+
+        # Element whose text (e.g. a reference number) is saved with each row's result
+        confirmation_frame = ttk.Frame(basic_frame)
+        confirmation_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Label(confirmation_frame, text="Confirmation:").pack(side="left")
+        self.confirmation_type = ttk.Combobox(confirmation_frame, values=["CSS", "ID", "XPATH"], state="readonly", width=7)
+        self.confirmation_type.set("CSS")
+        self.confirmation_type.pack(side="left", padx=5)
+        self.confirmation_entry = ttk.Entry(confirmation_frame)
+        self.confirmation_entry.pack(side="left", fill="x", expand=True, padx=5)
+
         # Auto-confirm option
         confirm_frame = ttk.Frame(basic_frame)
         confirm_frame.pack(fill="x", padx=5, pady=5)
@@ -136,6 +183,20 @@ class LazyWorkerGUI:
             text="Auto-confirm dialogs",
             variable=self.auto_confirm
         ).pack(side="left")
+        
+        # Submit mode: fill every row in the browser, or record one and replay the rest over HTTP
+        ttk.Label(confirm_frame, text="Submit Mode:").pack(side="left", padx=(20, 2))
+        self.submit_mode = tk.StringVar(value="dom")
+        ttk.Combobox(
+            confirm_frame,
+            textvariable=self.submit_mode,
+            values=["dom", "replay"],
+            state="readonly",
+            width=8
+        ).pack(side="left")
+        ttk.Label(confirm_frame, text="Replay Success Text:").pack(side="left", padx=(10, 2))
+        self.replay_success_entry = ttk.Entry(confirm_frame, width=25)
+        self.replay_success_entry.pack(side="left")
 
         # Create container frame for side by side layout
         container_frame = ttk.Frame(self.main_frame)
@@ -152,15 +213,19 @@ class LazyWorkerGUI:
         ttk.Button(control_frame, text="Remove Selected", command=self.remove_selected_mapping).pack(side="left")
         
         # Mapping list with headers and bindings
-        self.mapping_tree = ttk.Treeview(mapping_frame, columns=("Excel Column", "Selector Type", "Web Selector"), show="headings")
+        self.mapping_tree = ttk.Treeview(mapping_frame, columns=("Excel Column", "Selector Type", "Web Selector", "Fill Mode", "Transform"), show="headings")
         self.mapping_tree.heading("Excel Column", text="Excel Column")
         self.mapping_tree.heading("Selector Type", text="Selector Type")
         self.mapping_tree.heading("Web Selector", text="Web Selector")
+        self.mapping_tree.heading("Fill Mode", text="Fill Mode")
+        self.mapping_tree.heading("Transform", text="Transform")
         
         # Update tree column widths for side by side layout
         self.mapping_tree.column("Excel Column", width=150)
         self.mapping_tree.column("Selector Type", width=100)
         self.mapping_tree.column("Web Selector", width=200)
+        self.mapping_tree.column("Fill Mode", width=70)
+        self.mapping_tree.column("Transform", width=150)
         self.mapping_tree.pack(fill="both", expand=True, padx=5, pady=5)
         
         # Bind double-click event
@@ -209,6 +274,8 @@ class LazyWorkerGUI:
         # Right side buttons
         self.start_button = ttk.Button(btn_frame, text="Start Automation", command=self.start_automation)
         self.start_button.pack(side="right", padx=5)
+        self.rerun_button = ttk.Button(btn_frame, text="Re-run Failed", command=self.rerun_failed)
+        self.rerun_button.pack(side="right", padx=5)
         self.pause_button = ttk.Button(btn_frame, text="Pause", command=self.pause_automation, state="disabled")
         self.pause_button.pack(side="right", padx=5)
         self.stop_button = ttk.Button(btn_frame, text="Stop", command=self.stop_automation, state="disabled")
@@ -250,6 +317,9 @@ class LazyWorkerGUI:
         self.create_tooltip(self.username_entry, "Enter your login username")
         self.create_tooltip(self.password_entry, "Enter your login password")
         self.create_tooltip(self.mapping_tree, "Map Excel columns to web page elements")
+        self.create_tooltip(self.blocked_urls_entry, "Comma-separated URL patterns not to load, e.g. *chat-widget*, *.pdf")
+        self.create_tooltip(self.replay_success_entry, "Text the response must contain for a replayed row to count as saved")
+        self.create_tooltip(self.confirmation_entry, "Selector of a value to save with each row's result, e.g. a generated reference number")
     
     def create_tooltip(self, widget, text):
         def show_tooltip(event):
@@ -269,7 +339,7 @@ class LazyWorkerGUI:
         widget.bind('<Enter>', show_tooltip)
     
     def add_field_mapping(self):
-        self.mapping_tree.insert("", "end", values=("New Column", "CSS", "CSS Selector"))
+        self.mapping_tree.insert("", "end", values=("New Column", "CSS", "CSS Selector", "keys", ""))
     
     def remove_selected_mapping(self):
         selected = self.mapping_tree.selection()
@@ -282,8 +352,9 @@ class LazyWorkerGUI:
         column = self.mapping_tree.identify_column(event.x)
         column_id = int(column[1]) - 1  # Convert column identifier to index
         
-        # Get current value
-        current_values = self.mapping_tree.item(item_id)['values']
+        # Get current value (older rows may not have a Transform value yet)
+        current_values = list(self.mapping_tree.item(item_id)['values']) + [""] * 4
+        current_values = current_values[:5]
         
         # Create editing popup
         edit_window = tk.Toplevel(self.root)
@@ -306,11 +377,36 @@ class LazyWorkerGUI:
             selector_type.set(current_values[column_id])
             selector_type.pack(pady=5)
             entry = selector_type
+        elif column_id == 3:  # Fill Mode column
+            entry.destroy()
+            fill_mode = ttk.Combobox(edit_window, values=["keys", "js"], state="readonly")
+            fill_mode.set(current_values[column_id])
+            fill_mode.pack(pady=5)
+            ttk.Label(edit_window, text="js sets the value in one batch; keys types it", wraplength=250).pack()
+            entry = fill_mode
+        elif column_id == 4:  # Transform column
+            edit_window.geometry("420x130")
+            ttk.Label(
+                edit_window,
+                text='JSON list, e.g. [{"op": "strip"}, {"op": "zfill", "width": 8}]',
+                wraplength=400
+            ).pack()
         
         entry.select_range(0, tk.END)
         entry.focus()
         
         def save_changes():
+            if column_id == 4 and entry.get().strip():
+                try:
+                    steps = json.loads(entry.get())
+                except ValueError:
+                    tk.messagebox.showerror("Invalid Transform", "Transform must be a JSON list of steps")
+                    return
+                # Same checks the run makes, so a config that won't start can't be saved
+                errors = TransformPipeline([{'excel_column': current_values[0], 'transform': steps}]).errors
+                if errors:
+                    tk.messagebox.showerror("Invalid Transform", errors[0])
+                    return
             # Update the value in the tree
             new_values = list(current_values)
             new_values[column_id] = entry.get()
@@ -392,11 +488,17 @@ class LazyWorkerGUI:
         edit_window.grab_set()
     
     def select_file(self):
-        filename = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx *.xls")])
+        filename = filedialog.askopenfilename(filetypes=[
+            ("Data files", " ".join(f"*{extension}" for extension in SUPPORTED_EXTENSIONS)),
+            ("Excel files", "*.xlsx *.xls"),
+            ("CSV and TSV files", "*.csv *.tsv"),
+            ("JSON Lines files", "*.jsonl *.ndjson"),
+            ("Parquet files", "*.parquet")
+        ])
         if filename:
             try:
                 # Initialize Excel handler and validate file
-                excel_handler = ExcelHandler(filename)
+                excel_handler = ExcelHandler(filename, disk_cache=bool(self.settings_manager.settings.get('disk_cache', 1)))
                 sheets = excel_handler.get_sheet_names()
                 
                 # If multiple sheets exist, show sheet selection dialog
@@ -426,21 +528,25 @@ class LazyWorkerGUI:
                     if not selected_sheet:  # User closed dialog
                         return
                 
-                # Load data from selected or first sheet
-                data = excel_handler.get_data(selected_sheet)
+                # Load data from selected or first sheet. Parsed data (or, when streaming,
+                # just the row count and header) is cached and reused by the run.
+                stream = bool(self.settings_manager.settings.get('stream_excel', 1))
+                data = excel_handler.get_rows(selected_sheet, stream=stream)
+                columns = list(data.columns)
                 
                 # Store full path for tooltip
                 self.file_path_label.full_path = filename
+                self.selected_sheet = selected_sheet
                 
                 # Update display path - show full path in readonly entry
                 self.file_path.set(filename)
                 
                 # Show success message with sheet name
                 sheet_info = f" (Sheet: {selected_sheet})" if selected_sheet else ""
-                self.update_status(f"Excel loaded successfully{sheet_info}: {len(data)} rows, {len(data.columns)} columns")
+                self.update_status(f"Excel loaded successfully{sheet_info}: {len(data)} rows, {len(columns)} columns")
                 
                 # Show available columns in status
-                column_list = ', '.join(data.columns)
+                column_list = ', '.join(columns)
                 self.update_status(f"Available columns: {column_list}")
                 
             except Exception as e:
@@ -453,6 +559,40 @@ class LazyWorkerGUI:
                     f"Failed to load Excel file:\n{str(e)}"
                 )
     
+    def get_field_mappings(self):
+        """Get mapping values directly from the Treeview items"""
+        mappings = []
+        for item_id in self.mapping_tree.get_children():
+            values = self.mapping_tree.item(item_id)['values']
+            mapping = {
+                "excel_column": values[0],
+                "selector_type": values[1],
+                "web_selector": values[2],
+                "fill_mode": values[3] if len(values) > 3 and values[3] else "keys"
+            }
+            if len(values) > 4 and str(values[4]).strip():
+                mapping["transform"] = json.loads(values[4])
+            mappings.append(mapping)
+        return mappings
+    
+    def get_post_submit_actions(self):
+        """Get post-submit actions from the Treeview items"""
+        actions = []
+        for item_id in self.actions_tree.get_children():
+            values = self.actions_tree.item(item_id)['values']
+            actions.append({
+                "order": values[0],
+                "action": values[1],
+                "selector_type": values[2],
+                "selector": values[3],
+                "condition": values[4],
+                "delay": float(values[5])
+            })
+        return actions
+    
+    def get_blocked_urls(self):
+        return [pattern.strip() for pattern in self.blocked_urls_entry.get().split(",") if pattern.strip()]
+    
     def save_config(self):
         # Ask for configuration name
         name = simpledialog.askstring(
@@ -462,28 +602,8 @@ class LazyWorkerGUI:
         )
         
         if name:
-            # Get mapping values directly from the Treeview items
-            mappings = []
-            for item_id in self.mapping_tree.get_children():
-                values = self.mapping_tree.item(item_id)['values']
-                mappings.append({
-                    "excel_column": values[0],
-                    "selector_type": values[1],
-                    "web_selector": values[2]
-                })
-                
-            # Get post-submit actions
-            actions = []
-            for item_id in self.actions_tree.get_children():
-                values = self.actions_tree.item(item_id)['values']
-                actions.append({
-                    "order": values[0],
-                    "action": values[1],
-                    "selector_type": values[2],
-                    "selector": values[3],
-                    "condition": values[4],
-                    "delay": float(values[5])
-                })
+            mappings = self.get_field_mappings()
+            actions = self.get_post_submit_actions()
             
             config = {
                 "name": name,
@@ -493,8 +613,14 @@ class LazyWorkerGUI:
                 "password": self.password_entry.get(),
                 "field_mappings": mappings,
                 "excel_file": self.file_path.get(),
+                "excel_sheet": self.selected_sheet,
                 "post_submit_actions": actions,
-                "auto_confirm": self.auto_confirm.get()
+                "auto_confirm": self.auto_confirm.get(),
+                "submit_mode": self.submit_mode.get(),
+                "replay_success_text": self.replay_success_entry.get(),
+                "blocked_urls": self.get_blocked_urls(),
+                "confirmation_selector": self.confirmation_entry.get().strip(),
+                "confirmation_selector_type": self.confirmation_type.get()
             }
             
             saved_name = self.config_manager.save_config(config, name)
@@ -574,62 +700,69 @@ class LazyWorkerGUI:
         dialog.transient(self.root)
         dialog.grab_set()
     
-    def start_automation(self):
+    def rerun_failed(self):
+        """Run only the rows saved in a failed-rows file from an earlier run"""
+        filename = filedialog.askopenfilename(
+            initialdir="dead_letters",
+            filetypes=[("Failed rows", "*.csv")]
+        )
+        if filename:
+            self.start_automation(rerun_path=filename)
+    
+    def start_automation(self, rerun_path=None):
         """Run automation in background thread"""
         import threading
         
+        # Read everything from the widgets here, the worker thread must not touch Tk
+        # Get the full Excel path instead of display path
+        excel_path = getattr(self.file_path_label, 'full_path', self.file_path.get())
+        if not excel_path:
+            self.update_status("No Excel file selected")
+            return
+        
+        config = {
+            "url": self.url_entry.get(),
+            "form_url": self.form_url_entry.get(),
+            "username": self.username_entry.get(),
+            "password": self.password_entry.get(),
+            "field_mappings": self.get_field_mappings(),
+            "excel_file": excel_path,  # Use full path
+            "excel_sheet": self.selected_sheet,
+            "post_submit_actions": self.get_post_submit_actions(),
+            "auto_confirm": self.auto_confirm.get(),
+            "submit_mode": self.submit_mode.get(),
+            "replay_success_text": self.replay_success_entry.get(),
+            "blocked_urls": self.get_blocked_urls(),
+            "confirmation_selector": self.confirmation_entry.get().strip(),
+            "confirmation_selector_type": self.confirmation_type.get()
+        }
+        settings = self.settings_manager.settings
+        driver_pool = self.get_driver_pool()
+        
+        self.stop_flag = False
+        self.automation_running = True
+        self.start_button.configure(state="disabled")
+        self.rerun_button.configure(state="disabled")
+        self.pause_button.configure(state="normal")
+        self.stop_button.configure(state="normal")
+        
         def run_automation():
             try:
-                # Get the full Excel path instead of display path
-                excel_path = getattr(self.file_path_label, 'full_path', self.file_path.get())
-                if not excel_path:
-                    self.update_status("No Excel file selected")
-                    return
-
-                self.stop_flag = False
-                self.automation_running = True
-                self.start_button.configure(state="disabled")
-                self.pause_button.configure(state="normal")
-                self.stop_button.configure(state="normal")
-                
-                # Get mapping values directly from the Treeview items
-                mappings = []
-                for item_id in self.mapping_tree.get_children():
-                    values = self.mapping_tree.item(item_id)['values']
-                    mappings.append({
-                        "excel_column": values[0],
-                        "selector_type": values[1],
-                        "web_selector": values[2]
-                    })
-                    
-                # Get post-submit actions
-                actions = []
-                for item_id in self.actions_tree.get_children():
-                    values = self.actions_tree.item(item_id)['values']
-                    actions.append({
-                        "order": values[0],
-                        "action": values[1],
-                        "selector_type": values[2],
-                        "selector": values[3],
-                        "condition": values[4],
-                        "delay": float(values[5])
-                    })
-                
-                config = {
-                    "url": self.url_entry.get(),
-                    "form_url": self.form_url_entry.get(),
-                    "username": self.username_entry.get(),
-                    "password": self.password_entry.get(),
-                    "field_mappings": mappings,
-                    "excel_file": excel_path,  # Use full path
-                    "post_submit_actions": actions,
-                    "auto_confirm": self.auto_confirm.get()
-                }
-                
-                excel_handler = ExcelHandler(excel_path)
-                web_automator = WebAutomator(config, self)  # Pass 'self' as gui parameter
+                excel_handler = ExcelHandler(excel_path, disk_cache=bool(settings.get('disk_cache', 1)))
+                web_automator = WebAutomator(config, self, settings, driver_pool)  # GUI acts as the progress sink
                 self.update_status("Automation started.")
-                web_automator.run_automation(excel_handler.get_data())
+                if rerun_path:
+                    self.update_status(f"Re-running failed rows from {rerun_path}")
+                    data = load_dead_letters(rerun_path)
+                else:
+                    data = excel_handler.get_rows(
+                        config['excel_sheet'],
+                        stream=bool(settings.get('stream_excel', 1)),
+                        columns=web_automator.transforms.required_columns
+                    )
+                web_automator.run_automation(data)
+            except Exception as e:
+                self.update_status(f"Automation error: {str(e)}")
             finally:
                 self.root.after(0, self._automation_completed)
         
@@ -641,6 +774,7 @@ class LazyWorkerGUI:
         """Handle automation completion in main thread"""
         self.automation_running = False
         self.start_button.configure(state="normal")
+        self.rerun_button.configure(state="normal")
         self.pause_button.configure(state="disabled")
         self.stop_button.configure(state="disabled")
         self.update_status("Automation completed.")
@@ -658,18 +792,35 @@ class LazyWorkerGUI:
             self.update_status("Stopping automation...")
     
     def update_status(self, message):
-        """Throttled status updates to prevent GUI freezing"""
-        current_time = time.time()
-        self.update_queue.append(message)
-        
-        if current_time - self.last_update >= self.update_interval:
-            while self.update_queue:
-                msg = self.update_queue.pop(0)
-                self.status_var.set(msg)
-                self.status_text.insert("end", f"{msg}\n")
-                self.status_text.see("end")
-            self.last_update = current_time
-            self.root.update_idletasks()  # Use update_idletasks instead of update
+        """Queue a status message; safe to call from any thread"""
+        self.status_bus.post(message)
+
+    def set_progress(self, value, maximum=None):
+        """Queue a progress update; safe to call from any thread"""
+        self.status_bus.set_progress(value, maximum)
+
+    def _poll_status_bus(self):
+        """Apply queued status messages and progress in one batch on the Tk main loop"""
+        messages = self.status_bus.drain()
+        if messages:
+            self.status_var.set(messages[-1])
+            self.status_text.insert("end", "\n".join(messages) + "\n")
+            
+            # Keep the log a fixed-size ring instead of growing forever
+            line_count = int(self.status_text.index("end-1c").split(".")[0])
+            if line_count > self.MAX_LOG_LINES:
+                self.status_text.delete("1.0", f"{line_count - self.MAX_LOG_LINES + 1}.0")
+            self.status_text.see("end")
+        
+        progress = self.status_bus.take_progress()
+        if progress:
+            value, maximum = progress
+            if maximum is not None:
+                self.progress['maximum'] = maximum
+            if value is not None:
+                self.progress['value'] = value
+        
+        self._status_job = self.root.after(self.STATUS_POLL_MS, self._poll_status_bus)
 
     def open_website(self):
         import webbrowser
@@ -692,25 +843,33 @@ class LazyWorkerGUI:
         entries = {}
         for key, value in settings.items():
             ttk.Label(form_frame, text=key.replace('_', ' ').title()+':').grid(row=row, column=0, sticky='e', padx=5)
-            entry = ttk.Entry(form_frame)
-            entry.insert(0, str(value))
+            if key in self.settings_manager.CHOICES:
+                entry = ttk.Combobox(form_frame, values=self.settings_manager.CHOICES[key], state="readonly")
+                entry.set(str(value))
+            else:
+                entry = ttk.Entry(form_frame)
+                entry.insert(0, str(value))
             entry.grid(row=row, column=1, sticky='w', padx=5)
             entries[key] = entry
             row += 1
         
         def save_settings():
             try:
-                new_settings = {
-                    key: float(entry.get()) 
-                    for key, entry in entries.items()
-                }
+                # Keep integer settings (e.g. worker count) as integers and text settings as text
+                new_settings = {}
+                for key, entry in entries.items():
+                    default = self.settings_manager.DEFAULT_SETTINGS.get(key, 0.0)
+                    if isinstance(default, str):
+                        new_settings[key] = entry.get().strip()
+                    else:
+                        new_settings[key] = type(default)(float(entry.get()))
                 self.settings_manager.save_settings(new_settings)
                 settings_window.destroy()
                 self.update_status("Settings saved successfully")
             except ValueError:
                 tk.messagebox.showerror(
                     "Invalid Input",
-                    "All values must be numbers"
+                    "Numeric settings must be numbers"
                 )
         
         # Buttons
@@ -733,6 +892,9 @@ class LazyWorkerGUI:
                 self.stop_automation()
             else:
                 return
+        if self.driver_pool:
+            self.driver_pool.shutdown()
+        self.root.after_cancel(self._status_job)
         self.root.destroy()
         if self.welcome_screen:
             self.welcome_screen.show()
@@ -0,0 +1,87 @@
+from locator_cache import LocatorCache
+from action_plan import ClickStep, InputStep, WaitStep
+
+class Preflight:
+    """One-time check of the mappings against the data file and the live form before the first row"""
+    def __init__(self, automator):
+        self.automator = automator
+        self.sink = automator.sink
+        self.config = automator.config
+        self.skip_dead = bool(automator.settings.get('preflight_skip_dead', 0))
+
+    def missing_columns(self, columns):
+        columns = set(columns)
+        return [column for column in self.automator.transforms.required_columns if column not in columns]
+
+    def pre_submit_actions(self):
+        """(position, step) for action steps that must work on the form page itself.
+
+        That is every step up to and including the first unconditional click. Later steps act
+        on whatever page the submit leads to, so they can only be checked while running.
+        Conditional steps are allowed to be missing and aren't checked.
+        """
+        actions = []
+        for position, step in enumerate(self.automator.action_plan.steps):
+            if isinstance(step, (ClickStep, InputStep, WaitStep)) and not step.condition:
+                actions.append((position, step))
+                if isinstance(step, ClickStep):
+                    break
+        return actions
+
+    def find_dead(self, locators):
+        """Positions of locators still missing after one shared wait of at most wait_timeout"""
+        elements = [[None] * len(locators.locators)]
+
+        def all_present(driver):
+            elements[0] = locators.find_all(visible_only=False)
+            return None not in elements[0]
+
+        self.automator.waits.until(all_present, self.automator.wait_timeout)
+        return [position for position, element in enumerate(elements[0]) if element is None]
+
+    def run(self, columns):
+        """True if the run may start; with skipping on, dead selectors are marked on the automator"""
+        self.sink.update_status("Preflight: checking mappings against the form")
+        missing = self.missing_columns(columns)
+        for column in missing:
+            self.sink.update_status(f"Preflight: column '{column}' is not in the data file")
+
+        self.automator.wait_for_page_load()
+        mappings = self.config['field_mappings']
+        actions = self.pre_submit_actions()
+        # Fields and pre-submit actions are resolved together in a single batch
+        locators = LocatorCache(self.automator, mappings + [
+            {'selector_type': step.selector_type, 'web_selector': step.selector}
+            for _, step in actions
+        ])
+        dead = self.find_dead(locators)
+        dead_fields = [position for position in dead if position < len(mappings)]
+        dead_actions = [actions[position - len(mappings)] for position in dead if position >= len(mappings)]
+
+        for position in dead_fields:
+            mapping = mappings[position]
+            self.sink.update_status(
+                f"Preflight: field selector not found: {mapping['web_selector']} (column '{mapping['excel_column']}')"
+            )
+        for _, step in dead_actions:
+            self.sink.update_status(f"Preflight: {step.label} selector not found: {step.selector}")
+
+        if missing:
+            self.sink.update_status("Preflight failed: every row would fail on the missing columns")
+            return False
+        if not dead:
+            self.sink.update_status("Preflight passed")
+            return True
+        if not self.skip_dead:
+            self.sink.update_status(
+                "Preflight failed: fix the selectors above, or set preflight_skip_dead to 1 to skip them"
+            )
+            return False
+        if any(isinstance(step, ClickStep) for _, step in dead_actions):
+            self.sink.update_status("Preflight failed: the submit button can't be found, nothing could be submitted")
+            return False
+
+        self.automator.field_locators.skip = set(dead_fields)
+        self.automator.skip_actions = {position for position, _ in dead_actions}
+        self.sink.update_status(f"Preflight: skipping {len(dead)} dead selectors on every row")
+        return True
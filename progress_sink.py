@@ -0,0 +1,75 @@
+import json
+import sys
+import threading
+import time
+
+class ProgressSink:
+    """Interface WebAutomator uses to report progress and read pause/stop flags"""
+    def __init__(self):
+        self.stop_flag = False
+        self.paused = False
+    
+    def update_status(self, message):
+        pass
+    
+    def set_progress(self, value, maximum=None):
+        pass
+
+class ConsoleProgressSink(ProgressSink):
+    """Write progress to stdout as plain text or JSON lines"""
+    def __init__(self, json_lines=False, stream=None):
+        super().__init__()
+        self.json_lines = json_lines
+        self.stream = stream or sys.stdout
+        self.lock = threading.Lock()  # Workers report from several threads
+    
+    def _write(self, record):
+        with self.lock:
+            if self.json_lines:
+                self.stream.write(json.dumps(record) + "\n")
+            elif record["type"] == "status":
+                self.stream.write(f"[{time.strftime('%H:%M:%S')}] {record['message']}\n")
+            self.stream.flush()
+    
+    def update_status(self, message):
+        self._write({"type": "status", "time": time.time(), "message": message})
+    
+    def set_progress(self, value, maximum=None):
+        record = {"type": "progress", "time": time.time(), "value": value}
+        if maximum is not None:
+            record["maximum"] = maximum
+        self._write(record)
+
+class QueueProgressSink(ProgressSink):
+    """Forward progress from a shard process to the parent through a multiprocessing queue"""
+    def __init__(self, events, shard_id, stop_event, pause_event):
+        self.events = events
+        self.shard_id = shard_id
+        self.stop_event = stop_event
+        self.pause_event = pause_event
+    
+    @property
+    def stop_flag(self):
+        return self.stop_event.is_set()
+    
+    @stop_flag.setter
+    def stop_flag(self, value):
+        if value:
+            self.stop_event.set()
+    
+    @property
+    def paused(self):
+        return self.pause_event.is_set()
+    
+    @paused.setter
+    def paused(self, value):
+        if value:
+            self.pause_event.set()
+        else:
+            self.pause_event.clear()
+    
+    def update_status(self, message):
+        self.events.put(("status", self.shard_id, message))
+    
+    def set_progress(self, value, maximum=None):
+        self.events.put(("progress", self.shard_id, value, maximum))
@@ -0,0 +1,359 @@
+import html
+import http.cookiejar
+import json
+import re
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from run_journal import RunJournal
+
+# Names of hidden fields and headers that carry per-page anti-forgery tokens
+TOKEN_NAME = re.compile(r"csrf|xsrf|token|authenticity|nonce|requestverification", re.IGNORECASE)
+
+# Headers worth sending again; cookies and lengths are rebuilt per request
+REPLAY_HEADERS = ("content-type", "accept", "user-agent", "referer", "origin", "x-requested-with")
+
+PAGE_TOKENS_SCRIPT = """
+var fields = {};
+document.querySelectorAll("input[type='hidden'][name]").forEach(function(input) {
+    fields[input.name] = input.value;
+});
+var metas = {};
+document.querySelectorAll("meta[name][content]").forEach(function(meta) {
+    metas[meta.getAttribute('name')] = meta.getAttribute('content');
+});
+return {fields: fields, metas: metas};
+"""
+
+class RequestTemplate:
+    """A recorded form submission with each value bound to a column, a token or a constant"""
+    def __init__(self, url, method, headers, body_kind, fields, header_tokens, expected_url=None, expected_status=None):
+        self.url = url
+        self.method = method
+        self.headers = headers
+        self.body_kind = body_kind  # "form" or "json"
+        self.fields = fields  # [(name, source, value)] with source "column", "token" or "const"
+        self.header_tokens = header_tokens  # {header name: meta tag name}
+        # What the recorded submission led to, for checking replayed responses without a success text
+        self.expected_url = expected_url  # Page a redirect-after-POST landed on, None without a redirect
+        self.expected_status = expected_status  # Non-200 success status (e.g. 201), None otherwise
+
+    @property
+    def verifiable(self):
+        return bool(self.expected_url or self.expected_status)
+
+    @property
+    def needs_tokens(self):
+        return bool(self.header_tokens) or any(source == "token" for _, source, _ in self.fields)
+
+class ReplayEngine:
+    """Record one browser submission over CDP, then send the remaining rows as direct HTTP requests"""
+    def __init__(self, automator):
+        self.automator = automator
+        self.sink = automator.sink
+        self.config = automator.config
+        self.concurrency = max(1, int(automator.settings.get('replay_concurrency', 4)))
+        self.timeout = automator.page_load_timeout
+        self.success_text = self.config.get('replay_success_text', '')
+        self.opener = None
+
+    def run(self, rows, total_rows, journal):
+        """Process (index, row) pairs; True if every row was handled"""
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return True
+
+        index, row = first
+        template = self.record(index, row, total_rows, journal)
+        if template is None:
+            self.sink.update_status("Replay unavailable, continuing in the browser")
+            return self.automator.process_rows(rows, total_rows, journal)
+
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self._cookie_jar(self.automator.driver.get_cookies()))
+        )
+        if not self.success_text and not template.verifiable:
+            # A 200 that re-renders the form with a validation error would look like a success
+            self.sink.update_status(
+                "The recorded submission can't tell a saved row from a rejected one; set Replay Success "
+                "Text to replay. Continuing in the browser"
+            )
+            return self.automator.process_rows(rows, total_rows, journal)
+        
+        self.sink.update_status(f"Replaying remaining rows over HTTP ({self.concurrency} at a time)")
+        return self.replay(template, rows, total_rows, journal)
+
+    def record(self, index, row, total_rows, journal):
+        """Submit one row through the browser and capture the request it produced"""
+        driver = self.automator.driver
+        driver.get_log('performance')  # Discard network events from login and page loads
+        if not self.automator.wait_for_page_load():
+            return None
+        page_tokens = driver.execute_script(PAGE_TOKENS_SCRIPT) or {}
+        field_names = self._field_names()
+
+        if not self.automator.process_row(index, row, total_rows, journal):
+            return None
+        if self.automator.row_result['status'] != RunJournal.SUCCESS:
+            return None
+
+        request = self._find_submission(driver, row)
+        if request is None:
+            self.sink.update_status("No form submission was captured")
+            return None
+        return self._build_template(request, row, page_tokens, field_names)
+
+    def _field_names(self):
+        """Map the name attribute of each mapped form field to its Excel column"""
+        elements = self.automator.field_locators.find_all()
+        names = self.automator.driver.execute_script(
+            "return arguments[0].map(function(e) { return e ? (e.name || null) : null; });", elements
+        ) or []
+        return {name: column for name, column in zip(names, self.automator.value_columns) if name}
+
+    def _row_values(self, row):
+        """Mapped column for each non-empty value the row sent"""
+        values = {}
+        for column in self.automator.value_columns:
+            value = str(row[column])
+            if value:
+                values.setdefault(value, column)
+        return values
+
+    def _find_submission(self, driver, row):
+        """The captured POST whose body contains most of the row's values.
+
+        The request gets "finalUrl" (after redirects), "redirected" and "responseStatus" keys
+        describing how the server answered it.
+        """
+        row_values = self._row_values(row)
+        best = None
+        best_id = None
+        best_score = 0
+        final_urls = {}  # requestId -> URL of the last request in its redirect chain
+        redirected = set()
+        statuses = {}
+        for entry in driver.get_log('performance'):
+            message = json.loads(entry['message'])['message']
+            params = message.get('params', {})
+            if message.get('method') == 'Network.responseReceived':
+                statuses[params['requestId']] = params['response'].get('status')
+                continue
+            if message.get('method') != 'Network.requestWillBeSent':
+                continue
+            request = params['request']
+            final_urls[params['requestId']] = request.get('url')
+            if params.get('redirectResponse'):
+                redirected.add(params['requestId'])
+            if request.get('method') not in ("POST", "PUT"):
+                continue
+            body = request.get('postData')
+            if body is None and request.get('hasPostData'):
+                try:
+                    body = driver.execute_cdp_cmd(
+                        'Network.getRequestPostData', {'requestId': params['requestId']}
+                    ).get('postData')
+                except Exception:
+                    body = None
+            if not body:
+                continue
+            score = sum(1 for value in row_values if value in body or urlencode({"": value})[1:] in body)
+            if score > best_score:
+                best = dict(request, postData=body)
+                best_id = params['requestId']
+                best_score = score
+        if best is not None:
+            best.update(
+                finalUrl=final_urls.get(best_id, best['url']),
+                redirected=best_id in redirected,
+                responseStatus=statuses.get(best_id)
+            )
+        return best
+
+    def _build_template(self, request, row, page_tokens, field_names):
+        headers = {name.lower(): value for name, value in request.get('headers', {}).items()}
+        content_type = headers.get('content-type', '')
+        body = request['postData']
+        if 'application/x-www-form-urlencoded' in content_type:
+            pairs = parse_qsl(body, keep_blank_values=True)
+            body_kind = "form"
+        elif 'json' in content_type:
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                payload = None
+            if not isinstance(payload, dict) or any(isinstance(v, (dict, list)) for v in payload.values()):
+                self.sink.update_status("Replay supports only flat JSON bodies")
+                return None
+            pairs = list(payload.items())
+            body_kind = "json"
+        else:
+            self.sink.update_status(f"Replay does not support {content_type or 'this'} request bodies")
+            return None
+
+        row_values = self._row_values(row)
+        hidden_fields = page_tokens.get('fields', {})
+        fields = []
+        for name, value in pairs:
+            if name in field_names:
+                fields.append((name, "column", field_names[name]))
+            elif isinstance(value, str) and value in row_values:
+                fields.append((name, "column", row_values[value]))
+            elif TOKEN_NAME.search(name) and hidden_fields.get(name) == value:
+                fields.append((name, "token", name))  # Fetched fresh from the form page per request
+            else:
+                fields.append((name, "const", value))
+
+        metas = page_tokens.get('metas', {})
+        header_tokens = {}
+        for name, value in headers.items():
+            if TOKEN_NAME.search(name):
+                for meta_name, content in metas.items():
+                    if content == value:
+                        header_tokens[name] = meta_name
+
+        if not any(source == "column" for _, source, _ in fields):
+            self.sink.update_status("Captured request does not contain the row values")
+            return None
+
+        # A redirect-after-POST tells success by where it lands; a 200 on the same URL can't be told apart
+        # from the form re-rendered with errors, but a distinct success status (201, 204...) can
+        status = request.get('responseStatus')
+        expected_url = request['finalUrl'] if request.get('redirected') and request['finalUrl'] != request['url'] else None
+        expected_status = status if not expected_url and status and 200 < status < 300 else None
+        replay_headers = {name: value for name, value in headers.items() if name in REPLAY_HEADERS}
+        return RequestTemplate(
+            request['url'], request['method'], replay_headers, body_kind, fields, header_tokens,
+            expected_url, expected_status
+        )
+
+    def _cookie_jar(self, driver_cookies):
+        """Seed an HTTP cookie jar with the authenticated browser session"""
+        jar = http.cookiejar.CookieJar()
+        for cookie in driver_cookies:
+            domain = cookie.get('domain', '')
+            jar.set_cookie(http.cookiejar.Cookie(
+                version=0, name=cookie['name'], value=cookie['value'],
+                port=None, port_specified=False,
+                domain=domain, domain_specified=bool(domain), domain_initial_dot=domain.startswith('.'),
+                path=cookie.get('path', '/'), path_specified=True,
+                secure=cookie.get('secure', False), expires=cookie.get('expiry'),
+                discard=False, comment=None, comment_url=None,
+                rest={'HttpOnly': None} if cookie.get('httpOnly') else {}
+            ))
+        return jar
+
+    def _fetch_tokens(self, template):
+        """Load the form page once and read the current anti-forgery tokens from it"""
+        form_url = self.config.get('form_url') or self.config['url']
+        with self.opener.open(form_url, timeout=self.timeout) as response:
+            page = response.read().decode('utf-8', 'replace')
+
+        tokens = {}
+        for name, source, _ in template.fields:
+            if source == "token":
+                tokens[name] = _attribute(page, "input", "name", name, "value")
+        for header, meta_name in template.header_tokens.items():
+            tokens[header] = _attribute(page, "meta", "name", meta_name, "content")
+        return tokens
+
+    def send(self, template, row):
+        """Replay the request for one row; returns (success, reason)"""
+        tokens = self._fetch_tokens(template) if template.needs_tokens else {}
+
+        values = []
+        for name, source, value in template.fields:
+            if source == "column":
+                values.append((name, str(row[value])))
+            elif source == "token":
+                values.append((name, tokens.get(name) or ""))
+            else:
+                values.append((name, value))
+
+        if template.body_kind == "json":
+            body = json.dumps(dict(values)).encode()
+        else:
+            body = urlencode(values).encode()
+        headers = dict(template.headers)
+        for header in template.header_tokens:
+            headers[header] = tokens.get(header) or ""
+
+        request = urllib.request.Request(template.url, data=body, method=template.method, headers=headers)
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status = response.status
+                final_url = response.geturl()
+                page = response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return False, f"Replay request failed with HTTP {e.code}"
+
+        # Verify the response: not bounced to login, then showing the success text if configured,
+        # else ending where the recorded submission did
+        if final_url.rstrip('/') == self.config['url'].rstrip('/'):
+            return False, "Replay redirected to the login page, session expired"
+        if self.success_text:
+            if self.success_text not in page:
+                return False, "Success text not found in replay response"
+            return True, ""
+        if template.expected_url and urlsplit(final_url).path != urlsplit(template.expected_url).path:
+            return False, f"Replay ended on {final_url} instead of the recorded {template.expected_url}"
+        if template.expected_status and status != template.expected_status:
+            return False, f"Replay returned HTTP {status} instead of the recorded {template.expected_status}"
+        return True, ""
+
+    def _replay_row(self, template, index, row):
+        error_class = ""
+        try:
+            success, reason = self.send(template, row)
+        except Exception as e:
+            success, reason = False, f"Replay error: {str(e)}"
+            error_class = type(e).__name__
+        return index, row, success, reason, error_class
+
+    def _finish_row(self, future, journal, template):
+        index, row, success, reason, error_class = future.result()
+        self.automator.record_result(index, row, journal, {
+            "status": RunJournal.SUCCESS if success else RunJournal.FAILED,
+            "reason": reason,
+            "step": "replay",
+            "selector": template.url,
+            "error_class": error_class
+        })
+        self.automator.row_done()
+        if success:
+            self.sink.update_status(f"Successfully processed row {index + 1}")
+        else:
+            self.sink.update_status(f"Error in row {index + 1}: {reason}")
+
+    def replay(self, template, rows, total_rows, journal):
+        """Send rows concurrently, keeping a bounded number of requests in flight"""
+        finished = True
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            for index, row in rows:
+                if self.sink.stop_flag:
+                    self.sink.update_status("Automation stopped by user")
+                    finished = False
+                    break
+                self.automator.wait_while_paused()
+                if len(pending) >= self.concurrency * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._finish_row(future, journal, template)
+                pending.add(executor.submit(self._replay_row, template, index, row))
+
+            for future in wait(pending).done:
+                self._finish_row(future, journal, template)
+        return finished
+
+def _attribute(page, tag, key, key_value, attribute):
+    """Read one attribute of the first <tag key="key_value"> in an HTML page"""
+    for element in re.finditer(rf"<{tag}\b[^>]*>", page, re.IGNORECASE):
+        text = element.group(0)
+        match = re.search(rf"""\b{key}\s*=\s*["']{re.escape(key_value)}["']""", text, re.IGNORECASE)
+        if match:
+            value = re.search(rf"""\b{attribute}\s*=\s*["']([^"']*)["']""", text, re.IGNORECASE)
+            return html.unescape(value.group(1)) if value else None
+    return None
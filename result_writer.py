@@ -0,0 +1,242 @@
+import csv
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from openpyxl import load_workbook
+
+if sys.platform == "win32":
+    import msvcrt
+
+    def _try_lock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _unlock(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _try_lock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _unlock(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+# Columns added to the data file, after the existing ones
+RESULT_COLUMNS = ["LazyWorker Status", "LazyWorker Time", "LazyWorker Error", "LazyWorker Confirmation"]
+
+# Text of the confirmation element (value for inputs), or null when it isn't on the page.
+# Runs without waiting, so it can be checked after every action at almost no cost.
+CONFIRMATION_SCRIPT = """
+var type = arguments[0], selector = arguments[1], element = null;
+try {
+    if (type === 'ID') {
+        element = document.getElementById(selector);
+    } else if (type === 'XPATH') {
+        element = document.evaluate(selector, document, null,
+            XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    } else {
+        element = document.querySelector(selector);
+    }
+} catch (e) {
+    element = null;
+}
+if (!element) {
+    return null;
+}
+return element.value !== undefined && element.value !== '' ? element.value : element.textContent;
+"""
+
+def _modified_before(path, other):
+    """True if path exists and was last written before other"""
+    try:
+        return os.stat(path).st_mtime < os.stat(other).st_mtime
+    except OSError:
+        return False
+
+class FileLock:
+    """Lock file shared across processes, so shards writing to one file take turns.
+
+    The lock is taken with the OS (flock, or msvcrt on Windows), which releases it when its
+    holder exits or dies, so a lock is never stolen from a process that is still writing.
+    The file itself is left in place; deleting it would let two processes lock different files.
+    """
+    def __init__(self, path, timeout=600):
+        self.path = path
+        self.timeout = timeout
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a+b')
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                _try_lock(self.file)
+                return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.file.close()
+                    raise TimeoutError(f"{self.path} is still held by another process")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc):
+        try:
+            _unlock(self.file)
+        finally:
+            self.file.close()
+
+class ResultWriter:
+    """Row outcomes written back next to the data, in batches by a background thread.
+
+    For .xlsx workbooks, status, time, error and confirmation columns are added to the run's
+    sheet. They go in the workbook itself ("inplace") or in a <name>_results.xlsx copy
+    ("copy"). The copy is made again from the workbook whenever the workbook has changed
+    since the copy was last written. Loading and saving a large workbook takes minutes, so during the run batches
+    are only appended to a pending CSV beside it, and merged into the workbook once by
+    close(). A pending file left by a run that crashed is merged by the next one.
+    Other data files are never rewritten. Their results go to a <name>_results.csv
+    sidecar keyed by row number instead.
+    """
+    def __init__(self, config, mode="copy", flush_rows=200, flush_interval=10.0):
+        self.source = config['excel_file']
+        self.sheet = config.get('excel_sheet')
+        stem, extension = os.path.splitext(self.source)
+        self.to_workbook = extension.lower() == '.xlsx'
+        if not self.to_workbook:
+            name = f"{stem}_{self.sheet}" if self.sheet and extension.lower() == '.xls' else stem
+            self.path = f"{name}_results.csv"
+        elif mode == "inplace":
+            self.path = self.source
+        else:
+            self.path = f"{stem}_results.xlsx"
+        if self.to_workbook:
+            # One per sheet, as parallel shards can write different sheets of one workbook
+            sheet = re.sub(r"[^\w.-]", "_", self.sheet) if self.sheet else ""
+            self.pending_path = f"{self.path}.{sheet}.pending.csv" if sheet else f"{self.path}.pending.csv"
+            if _modified_before(self.pending_path, self.source):
+                # Left by a crashed run on an older version of the data; its row numbers no longer apply
+                os.remove(self.pending_path)
+        else:
+            self.pending_path = None
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.results = queue.Queue()  # Unbounded, so adding a result never waits on the disk
+        self.count = 0  # Rows written so far
+        self.error = None  # Last write error; the batch is kept and tried again
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add(self, index, row_result):
+        """Queue one row's outcome; safe to call from parallel workers"""
+        self.results.put((index, (
+            row_result['status'],
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            row_result.get('reason', ''),
+            row_result.get('confirmation', '')
+        )))
+
+    def _run(self):
+        pending = {}
+        last_flush = time.monotonic()
+        closing = False
+        while True:
+            try:
+                item = self.results.get(timeout=max(0.1, self.flush_interval - (time.monotonic() - last_flush)))
+            except queue.Empty:
+                item = ()
+            if item is None:
+                closing = True
+            elif item:
+                pending[item[0]] = item[1]  # A retried row keeps only its latest outcome
+            if pending and (closing or len(pending) >= self.flush_rows
+                            or time.monotonic() - last_flush >= self.flush_interval):
+                if self._flush(pending):
+                    pending = {}
+                last_flush = time.monotonic()
+            if closing:
+                return
+
+    def _flush(self, pending):
+        try:
+            if self.to_workbook:
+                self._write_sidecar(self.pending_path, pending)  # Only this writer appends to it
+            else:
+                with FileLock(f"{self.path}.lock"):
+                    self._write_sidecar(self.path, pending)
+        except Exception as e:
+            self.error = str(e)  # e.g. the file is open in Excel; kept for the next flush
+            return False
+        self.count += len(pending)
+        self.error = None
+        return True
+
+    def _read_pending(self):
+        """Row index -> latest result values from the pending file"""
+        results = {}
+        with open(self.pending_path, newline='', encoding='utf-8-sig') as f:
+            rows = csv.reader(f)
+            next(rows, None)  # Header
+            for row in rows:
+                if row:
+                    results[int(row[0])] = row[1:]
+        return results
+
+    def _merge(self):
+        """Write the pending results into the workbook in one load and save, then drop the pending file"""
+        if not os.path.exists(self.pending_path):
+            return
+        try:
+            with FileLock(f"{self.path}.lock"):
+                self._write_workbook(self._read_pending())
+        except Exception as e:
+            self.error = f"{e}; results are kept in {self.pending_path} and merged by the next run"
+            return
+        os.remove(self.pending_path)
+
+    def _write_workbook(self, pending):
+        if self.path != self.source and not _modified_before(self.source, self.path):
+            # A results copy made before the data was edited would put results next to the wrong rows
+            shutil.copyfile(self.source, self.path)
+        workbook = load_workbook(self.path)
+        try:
+            sheet = workbook[self.sheet] if self.sheet in workbook.sheetnames else workbook.worksheets[0]
+            header = [cell.value for cell in sheet[1]]
+            positions = []
+            for name in RESULT_COLUMNS:
+                if name not in header:
+                    header.append(name)
+                    sheet.cell(row=1, column=len(header), value=name)
+                positions.append(header.index(name) + 1)
+            for index, values in pending.items():
+                for column, value in zip(positions, values):
+                    sheet.cell(row=index + 2, column=column, value=value)  # Row 1 is the header
+            # Saved beside the file and swapped in, so a reader never sees a half-written workbook
+            temporary = f"{self.path}.tmp"
+            workbook.save(temporary)
+        finally:
+            workbook.close()
+        os.replace(temporary, self.path)
+
+    @staticmethod
+    def _write_sidecar(path, pending):
+        new_file = not os.path.exists(path)
+        with open(path, 'a', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(["_row"] + RESULT_COLUMNS)
+            for index, values in sorted(pending.items()):
+                writer.writerow([index] + list(values))
+
+    def close(self):
+        """Write whatever is still queued, stop the background thread and fill in the workbook"""
+        self.results.put(None)
+        self.thread.join()
+        if self.to_workbook:
+            self._merge()
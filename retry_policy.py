@@ -0,0 +1,135 @@
+import random
+import threading
+from selenium.common.exceptions import (
+    TimeoutException, StaleElementReferenceException, ElementClickInterceptedException,
+    NoSuchElementException, InvalidSessionIdException, NoSuchWindowException,
+    ElementNotInteractableException, InvalidElementStateException, UnexpectedTagNameException,
+    WebDriverException
+)
+
+# Failure classes, from the cheapest to recover from to the most expensive
+STALE = "stale_element"
+INTERCEPTED = "intercepted_click"
+TIMEOUT = "timeout"
+SESSION_DEAD = "session_dead"
+VALIDATION = "validation"
+ERROR = "error"  # Anything that doesn't fit a known class
+
+# (first delay, max delay) in seconds per class; classes left out are never retried
+BACKOFF = {
+    STALE: (0.1, 1.0),
+    INTERCEPTED: (0.25, 2.0),
+    TIMEOUT: (1.0, 8.0),
+    ERROR: (0.5, 4.0)
+}
+
+# WebDriver error texts that mean the browser or its session is gone
+DEAD_SESSION_MESSAGES = (
+    "invalid session id", "session deleted", "chrome not reachable", "disconnected",
+    "no such window", "target window already closed", "browser has closed", "not connected to devtools"
+)
+
+def classify(error):
+    """Failure class of an exception raised while driving the browser"""
+    if isinstance(error, RowFailure):
+        return error.failure_class
+    if isinstance(error, StaleElementReferenceException):
+        return STALE
+    if isinstance(error, ElementClickInterceptedException):
+        return INTERCEPTED
+    if isinstance(error, (TimeoutException, NoSuchElementException)):
+        return TIMEOUT
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)):
+        return SESSION_DEAD
+    if isinstance(error, (ElementNotInteractableException, InvalidElementStateException, UnexpectedTagNameException)):
+        return VALIDATION  # The page refuses the value; retrying the same data won't help
+    message = str(error).lower()
+    if any(text in message for text in DEAD_SESSION_MESSAGES):
+        return SESSION_DEAD
+    if type(error).__module__.startswith("urllib3"):
+        return SESSION_DEAD  # The driver's HTTP connection to chromedriver broke
+    return ERROR
+
+class RowFailure(Exception):
+    """A row step that failed for good, with its failure class and where it happened"""
+    def __init__(self, failure_class, step, selector="", error=None, message=""):
+        self.failure_class = failure_class
+        self.step = step
+        self.selector = selector
+        self.error = error
+        if not message and error is not None:
+            # WebDriver errors carry their text in .msg; str() adds a "Message:" prefix and a stacktrace
+            text = (error.msg or "") if isinstance(error, WebDriverException) else str(error)
+            message = text.strip().splitlines()[0] if text.strip() else type(error).__name__
+        super().__init__(message or failure_class)
+
+    @classmethod
+    def wrap(cls, error, step, selector=""):
+        if isinstance(error, RowFailure):
+            return error
+        return cls(classify(error), step, selector, error)
+
+    @property
+    def error_class(self):
+        return type(self.error).__name__ if self.error else self.failure_class
+
+class RetryPolicy:
+    """Per-class exponential backoff with jitter, bounded by a retry budget for the whole run"""
+    def __init__(self, settings):
+        self.max_retries = int(settings.get('max_retries', 3))
+        self.budget = int(settings.get('retry_budget', 200))
+        self.max_restarts = int(settings.get('max_session_restarts', 3))
+        self.lock = threading.Lock()  # Shared by parallel workers
+        self.failures = {}
+        self.retries = {}
+        self.restarts = 0
+        self.budget_reported = False
+
+    def should_retry(self, failure_class, attempt):
+        """Take one retry from the budget if this failure class and attempt allow it"""
+        if failure_class not in BACKOFF or attempt >= self.max_retries:
+            return False
+        with self.lock:
+            if self.budget <= 0:
+                return False
+            self.budget -= 1
+            self.retries[failure_class] = self.retries.get(failure_class, 0) + 1
+            return True
+
+    def budget_exhausted(self):
+        """True the first time the run is found to be out of retries"""
+        with self.lock:
+            if self.budget > 0 or self.budget_reported:
+                return False
+            self.budget_reported = True
+            return True
+
+    def delay(self, failure_class, attempt):
+        """Backoff before retry number `attempt`, with full jitter so workers don't retry in step"""
+        first, cap = BACKOFF.get(failure_class, BACKOFF[ERROR])
+        return random.uniform(0, min(cap, first * (2 ** attempt)))
+
+    def record_failure(self, failure_class):
+        with self.lock:
+            self.failures[failure_class] = self.failures.get(failure_class, 0) + 1
+
+    def allow_restart(self):
+        """Take one browser restart; a run that keeps losing its session should stop"""
+        with self.lock:
+            if self.restarts >= self.max_restarts:
+                return False
+            self.restarts += 1
+            return True
+
+    def format_summary(self):
+        """One line per failure class seen during the run"""
+        with self.lock:
+            classes = sorted(set(self.failures) | set(self.retries))
+            lines = [
+                f"{failure_class}: {self.failures.get(failure_class, 0)} failed, "
+                f"{self.retries.get(failure_class, 0)} retried"
+                for failure_class in classes
+            ]
+            if self.restarts:
+                lines.append(f"session restarts: {self.restarts}")
+        return lines
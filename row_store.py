@@ -0,0 +1,55 @@
+import pandas as pd
+
+class Record:
+    """One row as a plain tuple of values, read by column name like a pandas Series"""
+    __slots__ = ("values",)
+    positions = {}  # Column name -> position, set on the per-store subclass
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, column):
+        return self.values[self.positions[column]]
+
+    def get(self, column, default=None):
+        position = self.positions.get(column)
+        return default if position is None else self.values[position]
+
+    def to_dict(self):
+        return dict(zip(self.positions, self.values))
+
+def record_type(columns):
+    """Record class for a column layout; rows share it, so each row only carries its tuple"""
+    return type("Record", (Record,), {"__slots__": (), "positions": {column: position for position, column in enumerate(columns)}})
+
+class RowStore:
+    """Column arrays for just the columns a run uses, iterated as Records instead of pandas Series"""
+    def __init__(self, frame):
+        self.columns = list(frame.columns)
+        self.index = frame.index.tolist()
+        self.arrays = [frame.iloc[:, position].to_numpy(dtype=object) for position in range(len(self.columns))]
+        self.record_type = record_type(self.columns)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def empty(self):
+        return not self.index
+
+    def iterrows(self):
+        make = self.record_type
+        for index, values in zip(self.index, zip(*self.arrays)):
+            yield index, make(values)
+
+def compact_rows(data, transforms):
+    """Rows for a run holding only the columns the mappings read, plus their transformed values.
+
+    A DataFrame becomes a RowStore; a row stream is narrowed so it yields Records as it reads.
+    """
+    if data is None:
+        return None
+    if isinstance(data, pd.DataFrame):
+        frame = data[[column for column in transforms.required_columns if column in data.columns]]
+        return RowStore(transforms.apply(frame))
+    return transforms.apply(data.select(transforms.required_columns))
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+class RunJournal:
+    """Persistent per-run record of row outcomes so an interrupted run can resume"""
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    
+    def __init__(self, run_key, journal_dir="configs/journals"):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.path = os.path.join(journal_dir, f"{run_key}.db")
+        self.lock = threading.Lock()  # Shared by parallel workers
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # Survives app crashes, cheap per-row commits
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row_index INTEGER PRIMARY KEY, status TEXT NOT NULL, reason TEXT, updated REAL)"
+        )
+        self.conn.commit()
+    
+    @staticmethod
+    def run_key(config, track_version=True):
+        """Identify a run by its data file (including its version, if tracked) and automation settings"""
+        excel_path = os.path.abspath(config.get('excel_file', ''))
+        try:
+            stat = os.stat(excel_path)
+            file_version = [stat.st_size, int(stat.st_mtime)] if track_version else []
+        except OSError:
+            file_version = []
+        key = {
+            "excel_file": excel_path,
+            "file_version": file_version,
+            "excel_sheet": config.get('excel_sheet'),
+            "url": config.get('url'),
+            "form_url": config.get('form_url'),
+            "field_mappings": config.get('field_mappings'),
+            "post_submit_actions": config.get('post_submit_actions')
+        }
+        return hashlib.sha1(json.dumps(key, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    
+    @classmethod
+    def for_config(cls, config, track_version=True):
+        return cls(cls.run_key(config, track_version))
+    
+    def completed_rows(self):
+        """Rows that finished successfully or were skipped by a condition"""
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT row_index FROM rows WHERE status IN (?, ?)", (self.SUCCESS, self.SKIPPED)
+            )
+            return {row[0] for row in cursor}
+    
+    def record(self, row_index, status, reason=""):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO rows (row_index, status, reason, updated) VALUES (?, ?, ?, ?)",
+                (int(row_index), status, reason, time.time())
+            )
+            self.conn.commit()
+    
+    def failed_count(self):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM rows WHERE status = ?", (self.FAILED,)
+            ).fetchone()[0]
+    
+    def close(self, finished=False):
+        """Close the journal, deleting it once a finished run has nothing left to retry"""
+        remove = finished and self.failed_count() == 0
+        with self.lock:
+            self.conn.close()
+        if remove:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+class OutcomeCounter:
+    """Thread-safe tally of row outcomes in the current run, for the end-of-run summary"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+    
+    def add(self, status):
+        with self.lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+    
+    def as_dict(self):
+        with self.lock:
+            return {
+                status: self.counts.get(status, 0)
+                for status in (RunJournal.SUCCESS, RunJournal.FAILED, RunJournal.SKIPPED)
+            }
+    
+    def format_summary(self):
+        return ", ".join(f"{status}: {count}" for status, count in self.as_dict().items())
@@ -0,0 +1,79 @@
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlsplit
+
+READ_LOCAL_STORAGE = """
+var items = {};
+for (var i = 0; i < localStorage.length; i++) {
+    var key = localStorage.key(i);
+    items[key] = localStorage.getItem(key);
+}
+return items;
+"""
+
+WRITE_LOCAL_STORAGE = """
+var items = arguments[0];
+for (var key in items) {
+    localStorage.setItem(key, items[key]);
+}
+"""
+
+class SessionStore:
+    """Saved cookies and local storage of an authenticated session, one file per site and user"""
+    def __init__(self, config, session_dir="configs/sessions"):
+        self.session_dir = session_dir
+        key = f"{config.get('url', '')}|{config.get('username', '')}"
+        self.path = os.path.join(session_dir, hashlib.sha1(key.encode()).hexdigest()[:16] + ".json")
+    
+    def save(self, driver):
+        state = {
+            "saved": time.time(),
+            "origin": driver.execute_script("return location.origin"),
+            "cookies": driver.get_cookies(),
+            "local_storage": driver.execute_script(READ_LOCAL_STORAGE) or {}
+        }
+        os.makedirs(self.session_dir, exist_ok=True)
+        temp_path = self.path + ".tmp"
+        # Session cookies are as good as a password, keep the file private
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)  # Parallel workers may save at the same time
+    
+    def restore(self, driver, url):
+        """Load saved cookies and local storage into the browser; False if nothing usable is saved"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        parts = urlsplit(url)
+        origin = state.get("origin") or f"{parts.scheme}://{parts.netloc}"
+        # Cookies can only be set for the current domain; a small resource gets us there cheaply
+        driver.get(origin + "/favicon.ico")
+        
+        restored = 0
+        for cookie in state.get("cookies", []):
+            cookie = dict(cookie)
+            if "expiry" in cookie:
+                if cookie["expiry"] < time.time():
+                    continue
+                cookie["expiry"] = int(cookie["expiry"])
+            try:
+                driver.add_cookie(cookie)
+                restored += 1
+            except Exception:
+                continue  # Cookie for another domain or rejected by the browser
+        
+        if state.get("local_storage"):
+            driver.execute_script(WRITE_LOCAL_STORAGE, state["local_storage"])
+        return restored > 0 or bool(state.get("local_storage"))
+    
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -7,7 +7,35 @@ class SettingsManager:
         "page_load_timeout": 30,
         "implicit_wait": 5,
         "max_retries": 3,
-        "action_delay": 0.2
+        "action_delay": 0.2,
+        "worker_count": 1,  # Parallel browser sessions per run
+        "headless": 0,  # 1 runs Chrome without a window
+        "resume_runs": 1,  # 1 skips rows already completed by an interrupted run
+        "stream_excel": 1,  # 1 reads .xlsx rows lazily instead of loading the whole sheet
+        "disk_cache": 1,  # 1 keeps parsed sheets in cache/ so unchanged workbooks load instantly
+        "poll_interval": 0.05,  # Seconds between checks while waiting on page conditions
+        "quiet_period": 0.1,  # Seconds without DOM/network activity that count as settled
+        "reuse_session": 0,  # 1 saves login cookies and reuses them on the next run
+        "driver_pool_size": 0,  # Chrome sessions kept warm between runs (0 = off)
+        "driver_recycle_rows": 500,  # Replace a pooled session after this many rows (0 = never)
+        "driver_max_memory_mb": 1024,  # Replace a pooled session once its Chrome processes use more memory than this (0 = no limit)
+        "trace_enabled": 0,  # 1 records per-step timings and saves a Chrome trace to traces/
+        "replay_concurrency": 4,  # Parallel HTTP requests in replay submit mode
+        "retry_budget": 200,  # Retries allowed across the whole run before failures stop being retried
+        "max_session_restarts": 3,  # Chrome restarts after a crashed session before the run stops
+        "dead_letter_output": 1,  # 1 writes failed and skipped rows to dead_letters/ for re-running
+        "preflight": 1,  # 1 checks columns and selectors against the live form before the first row
+        "preflight_skip_dead": 0,  # 1 skips selectors the preflight can't find instead of refusing to start
+        "shard_processes": 0,  # Max shard processes at once (0 = limit by CPU cores and free RAM)
+        "chrome_memory_mb": 600,  # Memory to budget per Chrome session when limiting shard processes
+        "chrome_profile": "default",  # "throughput" blocks images/fonts/media/analytics and runs headless
+        "result_writeback": "off"  # "copy" or "inplace" writes each row's status back to the .xlsx (CSV sidecar otherwise)
+    }
+    
+    # Settings limited to a fixed set of values, shown as drop-downs in the settings dialog
+    CHOICES = {
+        "chrome_profile": ["default", "throughput"],
+        "result_writeback": ["off", "copy", "inplace"]
     }
     
     def __init__(self):
@@ -0,0 +1,209 @@
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+from progress_sink import QueueProgressSink
+
+# One unit of work: a sheet of a workbook processed with a configuration
+Shard = namedtuple("Shard", "workbook sheet config")
+
+def available_memory_mb():
+    """Memory available for new processes in MB, or None if it can't be read on this system"""
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
+                ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
+                ("ullTotalPageFile", ctypes.c_ulonglong), ("ullAvailPageFile", ctypes.c_ulonglong),
+                ("ullTotalVirtual", ctypes.c_ulonglong), ("ullAvailVirtual", ctypes.c_ulonglong),
+                ("ullAvailExtendedVirtual", ctypes.c_ulonglong)
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return status.ullAvailPhys / (1024 * 1024)
+    return None
+
+def concurrency_cap(settings, shard_count):
+    """Shard processes to run at once: bounded by CPU cores, free RAM and the shard_processes setting"""
+    cap = os.cpu_count() or 1
+    chromes_per_shard = max(1, int(settings.get('worker_count', 1)))
+    per_shard_mb = float(settings.get('chrome_memory_mb', 600)) * chromes_per_shard
+    available = available_memory_mb()
+    if available and per_shard_mb > 0:
+        cap = min(cap, int(available // per_shard_mb))
+    configured = int(settings.get('shard_processes', 0))
+    if configured > 0:
+        cap = min(cap, configured)
+    return max(1, min(cap, shard_count))
+
+def expand_shards(sources, config, all_sheets=False):
+    """Shards for (workbook, sheet) pairs; sheet None means the config's sheet, or every sheet with all_sheets"""
+    from excel_handler import ExcelHandler
+    shards = []
+    for workbook, sheet in sources:
+        if sheet is None and all_sheets:
+            shards.extend(Shard(workbook, name, config) for name in ExcelHandler(workbook).get_sheet_names())
+        else:
+            shards.append(Shard(workbook, sheet or config.get('excel_sheet'), config))
+    return shards
+
+def shard_label(shard):
+    name = os.path.basename(shard.workbook)
+    return f"{name}/{shard.sheet}" if shard.sheet else name
+
+def _run_shard(shard_id, shard, settings, events, stop_event, pause_event):
+    """Process entry point: run one shard in its own Chrome and report the outcome"""
+    import signal
+    from web_automation import WebAutomator
+    from excel_handler import ExcelHandler
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C goes to the parent, which stops shards cleanly
+    sink = QueueProgressSink(events, shard_id, stop_event, pause_event)
+    config = dict(shard.config, excel_file=shard.workbook, excel_sheet=shard.sheet)
+    automator = WebAutomator(config, sink, settings)
+    started = time.perf_counter()
+    error = ""
+    rows = 0
+    try:
+        data = ExcelHandler(shard.workbook, disk_cache=bool(settings.get('disk_cache', 1))).get_rows(
+            shard.sheet,
+            stream=bool(settings.get('stream_excel', 1)),
+            columns=automator.transforms.required_columns
+        )
+        rows = len(data)
+        automator.run_automation(data)
+    except Exception as e:
+        error = str(e)
+        sink.update_status(f"Shard error: {error}")
+    events.put(("result", shard_id, dict(
+        automator.outcomes.as_dict(),
+        rows=rows,
+        error=error,
+        finished=automator.finished,
+        seconds=round(time.perf_counter() - started, 1)
+    )))
+
+class ShardRunner:
+    """Run shards in separate processes, each with its own Chrome, and merge their progress.
+
+    A shard that crashes or hangs its browser only loses its own rows; the others go on.
+    """
+    def __init__(self, shards, settings, sink, report_dir="reports"):
+        self.shards = list(shards)
+        self.settings = settings
+        self.sink = sink
+        self.report_dir = report_dir
+        self.progress = {}
+        self.results = {}
+
+    def _handle(self, event):
+        kind, shard_id = event[0], event[1]
+        if kind == "status":
+            self.sink.update_status(f"[{shard_label(self.shards[shard_id])}] {event[2]}")
+        elif kind == "progress":
+            value, maximum = event[2], event[3]
+            previous_maximum = self.progress.get(shard_id, (0, 0))[1]
+            self.progress[shard_id] = (value, previous_maximum if maximum is None else maximum)
+            self.sink.set_progress(
+                sum(value for value, _ in self.progress.values()),
+                sum(maximum for _, maximum in self.progress.values())
+            )
+        elif kind == "result":
+            self.results[shard_id] = event[2]
+
+    def _drain(self, events, timeout):
+        try:
+            self._handle(events.get(timeout=timeout))
+            while True:
+                self._handle(events.get_nowait())
+        except queue.Empty:
+            pass
+
+    def run(self):
+        """Run every shard; returns the report dict"""
+        context = multiprocessing.get_context("spawn")  # No forked Tk or driver state in children
+        events = context.Queue()
+        stop_event = context.Event()
+        pause_event = context.Event()
+        cap = concurrency_cap(self.settings, len(self.shards))
+        self.sink.update_status(f"Running {len(self.shards)} shards, {cap} at a time")
+
+        started = time.perf_counter()
+        pending = list(enumerate(self.shards))
+        running = {}
+        while pending or running:
+            if self.sink.stop_flag and not stop_event.is_set():
+                stop_event.set()
+                self.sink.update_status(f"Stopping shards, {len(pending)} not started")
+                pending = []
+            if self.sink.paused != pause_event.is_set():
+                if self.sink.paused:
+                    pause_event.set()
+                else:
+                    pause_event.clear()
+
+            while pending and len(running) < cap:
+                shard_id, shard = pending.pop(0)
+                process = context.Process(
+                    target=_run_shard,
+                    args=(shard_id, shard, self.settings, events, stop_event, pause_event),
+                    daemon=True
+                )
+                process.start()
+                running[shard_id] = process
+                self.sink.update_status(f"[{shard_label(shard)}] Started")
+
+            self._drain(events, timeout=0.2)
+            for shard_id, process in list(running.items()):
+                if process.is_alive():
+                    continue
+                process.join()
+                self._drain(events, timeout=0)  # Pick up the result it sent just before exiting
+                del running[shard_id]
+                if shard_id not in self.results:
+                    self.results[shard_id] = {"error": f"Shard process exited with code {process.exitcode}"}
+                    self.sink.update_status(f"[{shard_label(self.shards[shard_id])}] Crashed")
+
+        return self.report(time.perf_counter() - started)
+
+    def report(self, seconds):
+        """Merge shard results into one report, log it and save it as JSON"""
+        shards = []
+        totals = {"rows": 0, "success": 0, "failed": 0, "skipped": 0}
+        for shard_id, shard in enumerate(self.shards):
+            result = self.results.get(shard_id, {"error": "Not started"})
+            shards.append(dict(result, workbook=shard.workbook, sheet=shard.sheet))
+            for key in totals:
+                totals[key] += result.get(key, 0)
+            status = result.get('error') or ", ".join(f"{key}: {result.get(key, 0)}" for key in ("success", "failed", "skipped"))
+            self.sink.update_status(f"Shard {shard_label(shard)} - {status}")
+
+        report = {"seconds": round(seconds, 1), "totals": totals, "shards": shards}
+        self.sink.update_status(
+            f"All shards - {totals['success']} succeeded, {totals['failed']} failed, "
+            f"{totals['skipped']} skipped of {totals['rows']} rows in {report['seconds']}s"
+        )
+        try:
+            os.makedirs(self.report_dir, exist_ok=True)
+            path = os.path.join(self.report_dir, f"shards_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=4)
+            self.sink.update_status(f"Report saved to {path}")
+        except OSError as e:
+            self.sink.update_status(f"Report save error: {str(e)}")
+        return report
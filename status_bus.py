@@ -0,0 +1,37 @@
+import threading
+from collections import deque
+
+class StatusBus:
+    """Bounded hand-off of status messages and progress from worker threads to the Tk loop"""
+    def __init__(self, max_messages=1000):
+        self.messages = deque(maxlen=max_messages)  # Oldest messages drop first when full
+        self.lock = threading.Lock()
+        self.progress_value = None
+        self.progress_maximum = None
+    
+    def post(self, message):
+        self.messages.append(message)  # deque.append is atomic, no lock needed
+    
+    def set_progress(self, value, maximum=None):
+        """Record the latest progress; intermediate values are coalesced"""
+        with self.lock:
+            self.progress_value = value
+            if maximum is not None:
+                self.progress_maximum = maximum
+    
+    def drain(self, limit=500):
+        """Take up to `limit` queued messages, oldest first"""
+        batch = []
+        while self.messages and len(batch) < limit:
+            batch.append(self.messages.popleft())
+        return batch
+    
+    def take_progress(self):
+        """Return (value, maximum) set since the last call, or None if unchanged"""
+        with self.lock:
+            if self.progress_value is None and self.progress_maximum is None:
+                return None
+            progress = (self.progress_value, self.progress_maximum)
+            self.progress_value = None
+            self.progress_maximum = None
+            return progress
@@ -0,0 +1,29 @@
+import os
+from openpyxl import Workbook, load_workbook
+from result_writer import ResultWriter
+
+def write_rows(path, rows):
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+def record(source, index, status):
+    writer = ResultWriter({'excel_file': str(source), 'excel_sheet': None}, "copy")
+    writer.add(index, {'status': status})
+    writer.close()
+    assert writer.error is None
+    return [[cell.value for cell in row][:2] for row in load_workbook(writer.path).active.iter_rows()]
+
+def test_copy_is_rebuilt_after_the_workbook_changes(tmp_path):
+    source = tmp_path / "data.xlsx"
+    write_rows(source, [["Name"], ["a"], ["b"]])
+    assert record(source, 0, "success") == [["Name", "LazyWorker Status"], ["a", "success"], ["b", None]]
+    assert record(source, 1, "failed") == [["Name", "LazyWorker Status"], ["a", "success"], ["b", "failed"]]
+
+    write_rows(source, [["Name"], ["new"], ["a"], ["b"]])
+    later = os.stat(tmp_path / "data_results.xlsx").st_mtime + 1
+    os.utime(source, (later, later))
+    assert record(source, 2, "success") == [
+        ["Name", "LazyWorker Status"], ["new", None], ["a", None], ["b", "success"]
+    ]
@@ -0,0 +1,52 @@
+import pandas as pd
+from progress_sink import ProgressSink
+from row_store import RowStore
+from run_journal import RunJournal
+from settings_manager import SettingsManager
+from web_automation import WebAutomator
+
+class RecordingSink(ProgressSink):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.progress = []
+
+    def update_status(self, message):
+        self.messages.append(message)
+
+    def set_progress(self, value, maximum=None):
+        self.progress.append((value, maximum))
+
+def make_automator(sink):
+    config = {
+        'field_mappings': [{'excel_column': 'Name', 'web_selector': '#name', 'selector_type': 'CSS'}],
+        'post_submit_actions': []
+    }
+    return WebAutomator(config, sink, SettingsManager.DEFAULT_SETTINGS.copy())
+
+def test_resume_with_smaller_file_counts_only_its_rows(tmp_path):
+    # The original run completed rows 0-5; the failed-rows file re-runs rows 3 and 9
+    journal = RunJournal("resume", journal_dir=str(tmp_path))
+    for index in range(6):
+        journal.record(index, RunJournal.SUCCESS)
+    journal.record(9, RunJournal.FAILED)
+    data = RowStore(pd.DataFrame({'Name': ["c", "j"]}, index=[3, 9]))
+
+    sink = RecordingSink()
+    automator = make_automator(sink)
+    automator.fill_row = lambda row: True
+    done_rows = automator.resume_rows(journal, data)
+    assert done_rows == {3}
+    assert "Resuming run: 1 rows already completed" in sink.messages
+
+    rows = ((index, row) for index, row in data.iterrows() if index not in done_rows)
+    assert automator.process_rows(rows, len(data), journal)
+    assert max(value for value, _ in sink.progress) == len(data)
+    assert "Processing row 10 (2 of 2)" in sink.messages
+    journal.close()
+
+def test_resume_without_journal():
+    sink = RecordingSink()
+    automator = make_automator(sink)
+    assert automator.resume_rows(None, RowStore(pd.DataFrame({'Name': ["a"]}))) == set()
+    assert automator.rows_done == 0
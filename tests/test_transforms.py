@@ -0,0 +1,21 @@
+import pandas as pd
+from row_store import compact_rows
+from transforms import TransformPipeline
+
+def test_non_dict_step_is_a_config_error():
+    pipeline = TransformPipeline([{'excel_column': 'Name', 'transform': ["strip"]}])
+    assert pipeline.errors == ['Transform for column \'Name\': each step must be an object with an "op", not "strip"']
+    assert pipeline.value_columns == ['Name']
+
+def test_step_without_op_is_a_config_error():
+    pipeline = TransformPipeline([{'excel_column': 'Name', 'transform': [{"width": 8}]}])
+    assert len(pipeline.errors) == 1
+
+def test_format_reads_missing_column_as_empty():
+    pipeline = TransformPipeline([
+        {'excel_column': 'First', 'transform': [{"op": "format", "template": "{value} {Last}"}]}
+    ])
+    assert pipeline.errors == []
+    rows = compact_rows(pd.DataFrame({'First': ["Ada"]}), pipeline)
+    [(_, row)] = list(rows.iterrows())
+    assert row[pipeline.value_columns[0]] == "Ada "
@@ -0,0 +1,23 @@
+from workbook_cache import WorkbookCache
+
+def test_store_across_chunks_round_trips(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("A,B\n")
+    cache = WorkbookCache(cache_dir=str(tmp_path / "cache"), chunk_rows=2)
+    rows = [(0, ("a", "é")), (2, ("", "bb")), (3, ("c",)), (7, ("dd", ""))]
+    sheet = cache.store(str(source), None, "data", ["A", "B"], iter(rows), cache.file_version(str(source)))
+    frame = sheet.frame()
+    assert frame.index.tolist() == [0, 2, 3, 7]
+    assert frame.values.tolist() == [["a", "é"], ["", "bb"], ["c", ""], ["dd", ""]]
+    assert sorted(path.name.split(".", 1)[1] for path in (tmp_path / "cache").iterdir()) == [
+        "data.npy", "index.npy", "json", "offsets.npy"
+    ]
+
+def test_store_skips_a_file_changed_while_reading(tmp_path):
+    source = tmp_path / "data.csv"
+    source.write_text("A\n")
+    cache = WorkbookCache(cache_dir=str(tmp_path / "cache"))
+    version = cache.file_version(str(source))
+    source.write_text("A\nchanged\n")
+    assert cache.store(str(source), None, "data", ["A"], iter([(0, ("x",))]), version) is None
+    assert list((tmp_path / "cache").iterdir()) == []
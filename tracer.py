@@ -0,0 +1,121 @@
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+class _NullSpan:
+    """Shared do-nothing span handed out while tracing is disabled"""
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "start")
+    
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+
+class Tracer:
+    """Span timings for the automation hot path, exportable as Chrome trace events"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []  # list.append is atomic, workers record without locking
+        self.origin = time.perf_counter()
+    
+    def span(self, name, **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, args)
+    
+    def record(self, name, start, end, args):
+        self.events.append((name, start, end - start, threading.get_ident(), args))
+    
+    def export_chrome_trace(self, path):
+        """Write spans in the trace-event format understood by chrome://tracing and Perfetto"""
+        pid = os.getpid()
+        trace_events = [
+            {
+                "name": name,
+                "cat": "lazyworker",
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6, 1),
+                "dur": round(duration * 1e6, 1),
+                "pid": pid,
+                "tid": tid,
+                "args": args
+            }
+            for name, start, duration, tid, args in list(self.events)
+        ]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, f)
+        return path
+    
+    def summary(self):
+        """Per-step count, total, p50 and p95 durations in seconds"""
+        durations = {}
+        for name, _, duration, _, _ in list(self.events):
+            durations.setdefault(name, []).append(duration)
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "total": sum(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95)
+            }
+        return result
+    
+    def format_summary(self):
+        lines = []
+        for name, stats in sorted(self.summary().items(), key=lambda item: -item[1]["total"]):
+            lines.append(
+                f"{name}: {stats['count']} calls, total {stats['total']:.2f}s, "
+                f"p50 {stats['p50'] * 1000:.0f}ms, p95 {stats['p95'] * 1000:.0f}ms"
+            )
+        return lines
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def traced(name, details=None):
+    """Time a WebAutomator method as a span; `details` maps the call arguments to span args"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.tracer.enabled:
+                return method(self, *args, **kwargs)
+            span_args = {"row": self.current_row}
+            if details:
+                span_args.update(details(*args, **kwargs))
+            with self.tracer.span(name, **span_args):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,179 @@
+import json
+import re
+import string
+import pandas as pd
+from row_store import RowStore
+
+# Column names given to transformed values; never shown to the user or written back
+DERIVED_PREFIX = "__field_"
+
+class TransformPipeline:
+    """Per-mapping value transforms compiled once and applied to whole columns at a time.
+
+    A mapping's "transform" is a list of steps applied in order, for example
+    [{"op": "strip"}, {"op": "date", "from": "%d/%m/%Y", "to": "%Y-%m-%d"}, {"op": "zfill", "width": 8}].
+    A "format" step builds the value from a template such as "{First} {Last}", where
+    {value} stands for the mapped column, so it can also compute a column from others.
+    """
+    def __init__(self, mappings):
+        self.mappings = mappings
+        self.errors = []
+        self.steps = {}  # Mapping position -> compiled step functions
+        self.required_columns = []
+        self.value_columns = []  # Column holding the final value for each mapping
+        for position, mapping in enumerate(mappings):
+            references = set()
+            steps = []
+            transform = mapping.get('transform') or []
+            try:
+                for op in self.check_steps(transform):
+                    step, step_references = self._compile(op)
+                    steps.append(step)
+                    references.update(step_references)
+            except (KeyError, ValueError, TypeError, re.error) as e:
+                self.errors.append(f"Transform for column '{mapping['excel_column']}': {e}")
+                steps = []
+                transform = []
+
+            # A computed column (template first, without {value}) doesn't need its own source column
+            computed = bool(transform) and transform[0]['op'] == "format" and "value" not in references
+            if not computed:
+                references.add("value")
+            for reference in references:
+                column = mapping['excel_column'] if reference == "value" else reference
+                if column not in self.required_columns:
+                    self.required_columns.append(column)
+
+            if steps:
+                self.steps[position] = steps
+                self.value_columns.append(f"{DERIVED_PREFIX}{position}")
+            else:
+                self.value_columns.append(mapping['excel_column'])
+
+    @staticmethod
+    def check_steps(transform):
+        """The transform if it is a list of step objects that each name an op; raises ValueError otherwise"""
+        if not isinstance(transform, list):
+            raise ValueError("transform must be a list of steps")
+        for op in transform:
+            if not isinstance(op, dict) or 'op' not in op:
+                raise ValueError(f'each step must be an object with an "op", not {json.dumps(op, default=str)}')
+        return transform
+
+    @staticmethod
+    def _compile(op):
+        """(function(series, frame) -> series, referenced column names) for one step"""
+        kind = op['op']
+        if kind == "strip":
+            return (lambda series, frame: series.str.strip()), ()
+        if kind in ("upper", "lower", "title"):
+            return (lambda series, frame: getattr(series.str, kind)()), ()
+        if kind == "replace":
+            pattern = re.compile(op['pattern'])
+            replacement = str(op.get('with', ''))
+            return (lambda series, frame: series.str.replace(pattern, replacement, regex=True)), ()
+        if kind == "zfill":
+            width = int(op['width'])
+            return (lambda series, frame: series.str.zfill(width)), ()
+        if kind == "pad":
+            width = int(op['width'])
+            side = op.get('side', 'left')
+            if side not in ("left", "right", "both"):
+                raise ValueError(f"pad side must be left, right or both, not '{side}'")
+            fill = str(op.get('fill', ' '))
+            if len(fill) != 1:
+                raise ValueError("pad fill must be a single character")
+            return (lambda series, frame: series.str.pad(width, side=side, fillchar=fill)), ()
+        if kind == "date":
+            source_format = op.get('from') or None  # None lets pandas work the format out
+            target_format = op['to']
+
+            def reformat(series, frame):
+                parsed = pd.to_datetime(series, format=source_format, errors='coerce')
+                # Values that don't parse are sent unchanged rather than blanked
+                return parsed.dt.strftime(target_format).where(parsed.notna(), series)
+            return reformat, ()
+        if kind == "format":
+            parts = []
+            references = set()
+            for literal, field, spec, conversion in string.Formatter().parse(op['template']):
+                if spec or conversion:
+                    raise ValueError("format templates support plain {Column} fields only")
+                parts.append((literal, field))
+                if field is not None:
+                    references.add(field)
+
+            def render(series, frame):
+                result = pd.Series("", index=frame.index, dtype=object)
+                for literal, field in parts:
+                    if literal:
+                        result = result + literal
+                    if field is not None:
+                        if field == "value":
+                            result = result + series
+                        elif field in frame.columns:
+                            result = result + frame[field].astype(str)
+                        # A column missing from the file reads as empty, as in apply_frame
+                return result
+            return render, references
+        raise ValueError(f"unknown transform '{kind}'")
+
+    def apply(self, data):
+        """Data with an extra column per transformed mapping: a DataFrame, or a chunked row stream"""
+        if not self.steps or data is None:
+            return data
+        if isinstance(data, pd.DataFrame):
+            return self.apply_frame(data)
+        handler = getattr(data, 'handler', None)
+        return TransformedStream(self, data, getattr(handler, 'chunk_size', 1000))
+
+    def apply_frame(self, frame):
+        """New frame with the derived columns added; the (possibly cached) input is left untouched"""
+        derived = {}
+        for position, steps in self.steps.items():
+            column = self.mappings[position]['excel_column']
+            if column in frame.columns:
+                series = frame[column].astype(str)
+            else:
+                series = pd.Series("", index=frame.index, dtype=object)
+            for step in steps:
+                series = step(series, frame)
+            derived[self.value_columns[position]] = series.fillna("").astype(str)
+        return frame.assign(**derived)
+
+class TransformedStream:
+    """Row stream of Records (see ExcelRowStream.select) transformed chunk_size rows at a time"""
+    def __init__(self, pipeline, stream, chunk_size):
+        self.pipeline = pipeline
+        self.stream = stream
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.stream)
+
+    @property
+    def empty(self):
+        return self.stream.empty
+
+    @property
+    def columns(self):
+        return list(self.stream.columns) + [
+            self.pipeline.value_columns[position] for position in self.pipeline.steps
+        ]
+
+    def _transform(self, chunk):
+        frame = self.pipeline.apply_frame(pd.DataFrame(
+            [row.values for _, row in chunk], index=[index for index, _ in chunk],
+            columns=list(self.stream.columns), dtype=object
+        ))
+        return RowStore(frame).iterrows()
+
+    def iterrows(self):
+        chunk = []
+        for item in self.stream.iterrows():
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield from self._transform(chunk)
+                chunk = []
+        if chunk:
+            yield from self._transform(chunk)
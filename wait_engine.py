@@ -0,0 +1,75 @@
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Tracks DOM mutations plus pending XHR/fetch requests on the page. Returns true once
+# the page has reached one of the accepted ready states, nothing is in flight and the DOM
+# has been still for the quiet period.
+QUIET_SCRIPT = """
+var quietPeriod = arguments[0], readyStates = arguments[1];
+if (!window.__lazyworkerActivity) {
+    var activity = window.__lazyworkerActivity = {last: Date.now(), pending: 0};
+    var touch = function() { activity.last = Date.now(); };
+    new MutationObserver(touch).observe(document, {
+        subtree: true, childList: true, attributes: true, characterData: true
+    });
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        activity.pending++;
+        touch();
+        this.addEventListener('loadend', function() { activity.pending--; touch(); });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var fetch = window.fetch;
+        window.fetch = function() {
+            activity.pending++;
+            touch();
+            return fetch.apply(this, arguments).finally(function() { activity.pending--; touch(); });
+        };
+    }
+}
+var activity = window.__lazyworkerActivity;
+var jqueryActive = (typeof jQuery !== 'undefined') ? jQuery.active : 0;
+return readyStates.indexOf(document.readyState) >= 0 && activity.pending <= 0 && jqueryActive == 0 &&
+       (Date.now() - activity.last) >= quietPeriod;
+"""
+
+class WaitEngine:
+    """Bounded waits on concrete page conditions, polled at a short interval"""
+    def __init__(self, automator, poll_interval=0.05, quiet_period=0.1, ready_states=("complete",)):
+        self.automator = automator
+        self.poll_interval = poll_interval
+        self.quiet_period = quiet_period
+        self.ready_states = tuple(ready_states)  # document.readyState values that count as loaded
+    
+    def until(self, condition, timeout):
+        """Return the condition's first truthy result, or False once timeout runs out"""
+        try:
+            return WebDriverWait(
+                self.automator.driver, timeout, poll_frequency=self.poll_interval
+            ).until(condition)
+        except (TimeoutException, WebDriverException):
+            return False
+    
+    def wait_for_quiet(self, timeout, quiet_period=None):
+        """Wait until network requests finish and the DOM stops changing"""
+        quiet_ms = int((self.quiet_period if quiet_period is None else quiet_period) * 1000)
+        return self.until(lambda driver: driver.execute_script(QUIET_SCRIPT, quiet_ms, list(self.ready_states)), timeout)
+    
+    def wait_for_alert(self, timeout):
+        """Return the open alert, waiting up to timeout for one to appear"""
+        if timeout <= 0:
+            return EC.alert_is_present()(self.automator.driver)
+        return self.until(EC.alert_is_present(), timeout)
+    
+    def wait_for_clickable(self, element, timeout):
+        return self.until(lambda driver: element.is_displayed() and element.is_enabled(), timeout)
+    
+    def wait_for_navigation(self, from_url, timeout):
+        """Wait until the browser leaves from_url or a dialog opens"""
+        def navigated(driver):
+            if EC.alert_is_present()(driver):
+                return True
+            return driver.current_url != from_url
+        return self.until(navigated, timeout)
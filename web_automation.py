@@ -2,46 +2,225 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException, SessionNotCreatedException, StaleElementReferenceException, ElementClickInterceptedException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, WebDriverException, SessionNotCreatedException, StaleElementReferenceException, ElementClickInterceptedException, NoSuchElementException, UnexpectedAlertPresentException
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import Select
+import os
 import time
+from datetime import datetime
+from run_journal import RunJournal, OutcomeCounter
+from locator_cache import LocatorCache
+from wait_engine import WaitEngine
+from session_store import SessionStore
+from tracer import Tracer, traced
+from replay_engine import ReplayEngine
+from preflight import Preflight
+from action_plan import ActionPlan, SkipStep, SELECTOR_TYPES
+from transforms import TransformPipeline
+from row_store import compact_rows
+from dead_letter import DeadLetterWriter
+from result_writer import ResultWriter, CONFIRMATION_SCRIPT
+from retry_policy import RetryPolicy, RowFailure, classify, BACKOFF, STALE, INTERCEPTED, TIMEOUT, SESSION_DEAD
+
+# Sets many field values in one round trip. The native value setter is used so that
+# framework-bound inputs (React, Vue) notice the change, then input/change events fire.
+FAST_FILL_SCRIPT = """
+var elements = arguments[0], values = arguments[1];
+for (var i = 0; i < elements.length; i++) {
+    var element = elements[i], value = values[i];
+    if (element.isContentEditable) {
+        element.textContent = value;
+    } else {
+        var proto = element.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype
+            : element.tagName === 'SELECT' ? HTMLSelectElement.prototype
+            : HTMLInputElement.prototype;
+        var descriptor = Object.getOwnPropertyDescriptor(proto, 'value');
+        if (descriptor && descriptor.set) {
+            descriptor.set.call(element, value);
+        } else {
+            element.value = value;
+        }
+    }
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+}
+return elements.length;
+"""
+
+# Requests the throughput profile drops: images, fonts, media and common analytics/ad hosts.
+# .ico stays allowed because session restore loads /favicon.ico to set cookies on the origin.
+THROUGHPUT_BLOCKED_URLS = [
+    pattern
+    for extension in ("png", "jpg", "jpeg", "gif", "webp", "svg", "bmp", "avif",
+                      "woff", "woff2", "ttf", "otf", "eot",
+                      "mp4", "webm", "mp3", "ogg", "wav", "m4a")
+    for pattern in (f"*.{extension}", f"*.{extension}?*")
+] + [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*hotjar.com*", "*clarity.ms*", "*segment.io*", "*mixpanel.com*", "*newrelic.com*"
+]
+
+def page_load_strategy(settings):
+    """"eager" for the throughput profile, which hands control back once the DOM is ready"""
+    return "eager" if settings.get('chrome_profile', 'default') == "throughput" else "normal"
+
+def create_driver(settings, capture_network=False):
+    """Launch a Chrome session configured from the automation settings"""
+    chrome_options = Options()
+    throughput = settings.get('chrome_profile', 'default') == "throughput"
+    if capture_network:
+        # Network events in the performance log let replay mode record a form submission
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    if throughput:
+        # Small fixed viewport, and hand control back once the DOM is ready instead of
+        # after every image and stylesheet has loaded
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1280,800")
+        chrome_options.page_load_strategy = page_load_strategy(settings)
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    elif settings.get('headless', 0):
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1920,1080")
+    else:
+        chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-popup-blocking")
+    chrome_options.add_argument("--disable-gpu")  # Reduce GPU usage
+    chrome_options.add_argument("--disable-extensions")  # Disable extensions
+    chrome_options.add_argument("--disable-dev-shm-usage")  # Add for stability
+    chrome_options.add_argument("--no-sandbox")  # Add for stability
+    chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
+    # Leave unexpected dialogs open so confirm actions and close_dialogs can handle them
+    chrome_options.set_capability("unhandledPromptBehavior", "ignore")
+    
+    service = Service()
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.set_page_load_timeout(settings['page_load_timeout'])
+    driver.implicitly_wait(settings['implicit_wait'])
+    return driver
+
+def blocked_url_patterns(settings, config):
+    """URL patterns Chrome should not load for this run: the profile's defaults plus the config's own"""
+    patterns = list(THROUGHPUT_BLOCKED_URLS) if settings.get('chrome_profile', 'default') == "throughput" else []
+    patterns.extend(pattern for pattern in config.get('blocked_urls', []) if pattern)
+    return patterns
 
 class WebAutomator:
-    def __init__(self, config, gui):
+    def __init__(self, config, sink, settings, driver_pool=None, tracer=None, retry_policy=None):
         self.config = config
-        self.gui = gui
+        self.sink = sink  # Any ProgressSink, e.g. the GUI or a console writer
         self.driver = None
-        # Use settings from GUI
-        settings = gui.settings_manager.settings
+        self.driver_pool = driver_pool
+        self.settings = settings
         self.wait_timeout = settings['wait_timeout']
         self.page_load_timeout = settings['page_load_timeout']
         self.implicit_wait = settings['implicit_wait']
         self.max_retries = settings['max_retries']
         self.action_delay = settings['action_delay']
+        self.worker_count = max(1, int(settings.get('worker_count', 1)))
+        self.resume_runs = bool(settings.get('resume_runs', 1))
+        self.reuse_session = bool(settings.get('reuse_session', 0))
+        self.submit_mode = config.get('submit_mode', 'dom')
+        self.row_result = {"status": RunJournal.FAILED, "reason": "", "failure": None}
+        self.retry_policy = retry_policy or RetryPolicy(settings)  # Shared by parallel workers
+        self.session_lost = False  # Set when a dead browser could not be restarted
+        self.finished = False  # Set when a run got through every row, whatever their outcome
+        self.rows_done = 0  # Rows handled in this run (plus resumed ones), drives the progress bar
+        self.dead_letters = None  # DeadLetterWriter for failed and skipped rows, shared by workers
+        self.result_writer = None  # ResultWriter putting outcomes back into the data file, shared by workers
+        self.writeback_mode = str(settings.get('result_writeback', 'off'))
+        confirmation_type = str(config.get('confirmation_selector_type') or "CSS").upper()
+        confirmation = str(config.get('confirmation_selector') or "").strip()
+        self.confirmation_locator = (confirmation_type, confirmation) if confirmation else None
+        self.row_confirmation = ""  # Value read from the confirmation element for the current row
+        self.skip_actions = set()  # Positions of post-submit actions the preflight found dead
+        self.outcomes = OutcomeCounter()  # Shared by parallel workers
+        self.field_locators = LocatorCache(self, config['field_mappings'])
+        self.action_plan = ActionPlan(config['post_submit_actions'], config.get('auto_confirm'))
+        self.transforms = TransformPipeline(config['field_mappings'])
+        self.value_columns = self.transforms.value_columns  # Row key holding each mapping's final value
+        self.tracer = tracer or Tracer(enabled=bool(settings.get('trace_enabled', 0)))
+        self.current_row = None  # Row index attached to trace spans
+        self.waits = WaitEngine(
+            self,
+            poll_interval=settings.get('poll_interval', 0.05),
+            quiet_period=settings.get('quiet_period', 0.1),
+            # With the eager strategy, waiting for "complete" would wait out the images and
+            # stylesheets driver.get() no longer waits for
+            ready_states=("interactive", "complete") if page_load_strategy(settings) == "eager" else ("complete",)
+        )
     
     def setup_driver(self):
         try:
-            chrome_options = Options()
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--disable-notifications")
-            chrome_options.add_argument("--disable-popup-blocking")
-            chrome_options.add_argument("--disable-gpu")  # Reduce GPU usage
-            chrome_options.add_argument("--disable-extensions")  # Disable extensions
-            chrome_options.add_argument("--disable-dev-shm-usage")  # Add for stability
-            chrome_options.add_argument("--no-sandbox")  # Add for stability
-            chrome_options.add_experimental_option('excludeSwitches', ['enable-logging'])
-            
-            service = Service()
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.set_page_load_timeout(self.page_load_timeout)
-            self.driver.implicitly_wait(self.implicit_wait)
+            if self.submit_mode == "replay":
+                # Pooled drivers don't log network traffic, so replay runs launch their own
+                self.driver = create_driver(self.settings, capture_network=True)
+            elif self.driver_pool:
+                self.driver = self.driver_pool.acquire()
+            else:
+                self.driver = create_driver(self.settings)
+            self.apply_url_blocklist()
             return True
         except Exception as e:
-            self.gui.update_status(f"Driver setup error: {str(e)}")
+            self.sink.update_status(f"Driver setup error: {str(e)}")
+            return False
+    
+    def apply_url_blocklist(self):
+        """Block this run's URL patterns over CDP; pooled drivers get the list reset per run"""
+        patterns = blocked_url_patterns(self.settings, self.config)
+        if not patterns and not self.driver_pool:
+            return
+        try:
+            self.driver.execute_cdp_cmd("Network.enable", {})
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+        except Exception as e:
+            self.sink.update_status(f"URL blocklist error: {str(e)}")
+    
+    def release_driver(self):
+        """Give the driver back to the pool, or quit it when running without one"""
+        if not self.driver:
+            return
+        try:
+            if self.driver_pool and self.submit_mode != "replay":
+                self.driver_pool.release(self.driver)
+            else:
+                self.driver.quit()
+        except Exception:
+            pass  # A crashed browser can't be quit cleanly
+        self.driver = None
+    
+    def recycle_driver(self):
+        """Swap a worn-out pooled driver for a fresh one and log in again"""
+        self.sink.update_status("Recycling browser session")
+        self.release_driver()
+        return self.setup_driver() and self.login()
+    
+    def restart_session(self):
+        """Replace a browser whose session died with a fresh one and log in again"""
+        if not self.retry_policy.allow_restart():
+            self.sink.update_status("Browser session lost too many times, stopping")
             return False
+        self.sink.update_status("Browser session lost, restarting Chrome")
+        return self.recycle_driver()
+    
+    def session_alive(self):
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            return classify(e) != SESSION_DEAD
     
+    def count_row(self):
+        """Track rows served by a pooled driver; False if a needed recycle failed"""
+        if not self.driver_pool or self.submit_mode == "replay":
+            return True
+        self.driver_pool.count_row(self.driver)
+        if self.driver_pool.needs_recycle(self.driver):
+            return self.recycle_driver()
+        return True
+    
+    @traced("wait_for_element", lambda by, selector, *args, **kwargs: {"selector": selector})
     def wait_for_element(self, by, selector, timeout=None, check_visible=True):
         """Enhanced wait with visibility check and better error handling"""
         try:
@@ -58,21 +237,21 @@ class WebAutomator:
         except TimeoutException:
             return None
         except Exception as e:
-            self.gui.update_status(f"Wait error: {str(e)}")
+            self.sink.update_status(f"Wait error: {str(e)}")
             return None
 
     def safe_click(self, element, retries=3):
         for _ in range(retries):
             try:
-                if not element.is_displayed() or not element.is_enabled():
-                    time.sleep(0.5)
+                if not self.waits.wait_for_clickable(element, timeout=0.5):
                     continue
                 element.click()
                 return True
             except (StaleElementReferenceException, ElementClickInterceptedException):
-                time.sleep(0.5)
+                # Let whatever covers or re-renders the element settle before retrying
+                self.waits.wait_for_quiet(timeout=0.5)
             except Exception as e:
-                self.gui.update_status(f"Click error: {str(e)}")
+                self.sink.update_status(f"Click error: {str(e)}")
                 return False
         return False
 
@@ -91,7 +270,7 @@ class WebAutomator:
         for by, selector in selectors:
             field = self.wait_for_element(by, selector)
             if field:
-                self.gui.update_status(f"Found login field using: {by}={selector}")
+                self.sink.update_status(f"Found login field using: {by}={selector}")
                 return field
         
         raise TimeoutException("Could not find username/email input field")
@@ -112,15 +291,55 @@ class WebAutomator:
                 for by, selector in error_selectors:
                     error = self.wait_for_element(by, selector, timeout=1, check_visible=True)
                     if error:
-                        self.gui.update_status(f"Login failed: {error.text}")
+                        self.sink.update_status(f"Login failed: {error.text}")
                         return False
                 return False
             return True
         except Exception as e:
-            self.gui.update_status(f"Login verification error: {str(e)}")
+            self.sink.update_status(f"Login verification error: {str(e)}")
             return False
 
+    def restore_session(self):
+        """Try to continue a saved session; False means a full login is needed"""
+        store = SessionStore(self.config)
+        try:
+            if not store.restore(self.driver, self.config['url']):
+                return False
+            
+            target_url = self.config.get('form_url') or self.config['url']
+            self.driver.get(target_url)
+            self.wait_for_page_load()
+            
+            # Bounced back to the login page, or shown a password prompt: session is gone
+            on_login_page = (
+                bool(self.config.get('form_url'))
+                and self.driver.current_url.rstrip('/') == self.config['url'].rstrip('/')
+            )
+            if on_login_page or self.driver.execute_script(
+                "return !!document.querySelector(\"input[type='password']\")"
+            ):
+                self.sink.update_status("Saved session expired, logging in")
+                store.clear()
+                self.driver.delete_all_cookies()
+                return False
+            
+            self.sink.update_status("Restored saved session")
+            return True
+        except Exception as e:
+            self.sink.update_status(f"Session restore error: {str(e)}")
+            return False
+
+    def save_session(self):
+        try:
+            SessionStore(self.config).save(self.driver)
+        except Exception as e:
+            self.sink.update_status(f"Session save error: {str(e)}")
+
+    @traced("login")
     def login(self):
+        if self.reuse_session and self.restore_session():
+            return True
+        
         try:
             self.driver.get(self.config['url'])
             self.wait_for_page_load()
@@ -145,18 +364,21 @@ class WebAutomator:
             if not login_button or not self.safe_click(login_button):
                 return False
             
-            # Wait for login success and verify
-            time.sleep(2)  # Short wait for initial page transition
+            # Wait for the page transition (or a dialog) instead of a fixed pause
+            self.waits.wait_for_navigation(self.config['url'], timeout=self.wait_timeout)
             self.close_dialogs()
             
             # Check login success with retry
             for attempt in range(3):
                 if self.verify_login_success():
                     break
-                time.sleep(1)
                 if attempt == 2:  # Last attempt failed
-                    self.gui.update_status("Login verification failed - still on login page")
+                    self.sink.update_status("Login verification failed - still on login page")
                     return False
+                self.waits.wait_for_navigation(self.config['url'], timeout=1)
+            
+            if self.reuse_session:
+                self.save_session()
             
             # Handle form URL redirect if specified
             if self.config.get('form_url'):
@@ -165,176 +387,449 @@ class WebAutomator:
             return True
             
         except Exception as e:
-            self.gui.update_status(f"Login error: {str(e)}")
+            self.sink.update_status(f"Login error: {str(e)}")
             return False
 
+    @traced("wait_for_page_load")
     def wait_for_page_load(self, timeout=None):
         timeout = timeout or self.page_load_timeout
         try:
             # Wait for document ready state
-            WebDriverWait(self.driver, timeout).until(
-                lambda driver: driver.execute_script("return document.readyState") == "complete"
+            WebDriverWait(self.driver, timeout, poll_frequency=self.waits.poll_interval).until(
+                lambda driver: driver.execute_script("return document.readyState") in self.waits.ready_states
             )
             # Wait for jQuery if present
             jquery_ready = """
             return (typeof jQuery !== 'undefined') ? 
                    jQuery.active == 0 : true
             """
-            WebDriverWait(self.driver, 5).until(
+            WebDriverWait(self.driver, 5, poll_frequency=self.waits.poll_interval).until(
                 lambda driver: driver.execute_script(jquery_ready)
             )
             return True
+        except UnexpectedAlertPresentException:
+            return True  # Page is up and waiting on a dialog, which the next action handles
         except Exception:
             return False
 
     def get_by_type(self, selector_type):
-        selector_map = {
-            "CSS": By.CSS_SELECTOR,
-            "ID": By.ID,
-            "XPATH": By.XPATH
-        }
-        return selector_map.get(selector_type, By.CSS_SELECTOR)
+        return SELECTOR_TYPES.get(selector_type, By.CSS_SELECTOR)
     
-    def check_skip_condition(self, condition, selector_type, selector):
-        """Check if skip condition is met"""
+    def check_skip_condition(self, condition, by_type, selector):
+        """Check if a compiled Condition holds for the element at (by_type, selector)"""
         try:
-            by_type = self.get_by_type(selector_type)
-            if condition == "exists":
-                element = WebDriverWait(self.driver, 2).until(
-                    EC.presence_of_element_located((by_type, selector))
-                )
-                return True
-            elif condition == "not_exists":
+            if condition.kind == "exists":
+                return bool(self.waits.until(EC.presence_of_element_located((by_type, selector)), 2))
+            elif condition.kind == "not_exists":
                 try:
                     self.driver.find_element(by_type, selector)
                     return False
                 except NoSuchElementException:
                     return True
-            elif condition.startswith("contains:"):
-                text = condition.split(":", 1)[1]
+            elif condition.kind == "contains":
                 element = self.driver.find_element(by_type, selector)
-                return text in element.text
+                return condition.text in element.text
             return False
-        except (TimeoutException, NoSuchElementException):
-            return False if condition == "exists" else True
-
-    def handle_action(self, action, retry_count=0):
-        """Add retry logic for failed actions"""
-        try:
-            result = self._execute_action(action)
-            if not result and retry_count < self.max_retries:
-                self.gui.update_status(f"Retrying action {retry_count + 1}/{self.max_retries}")
-                time.sleep(1)  # Wait before retry
-                return self.handle_action(action, retry_count + 1)
-            return result
-        except Exception as e:
-            self.gui.update_status(f"Action error: {str(e)}")
+        except NoSuchElementException:
             return False
 
-    def _execute_action(self, action):
-        """Separated action execution logic"""
-        by_type = self.get_by_type(action["selector_type"])
-        try:
-            element = WebDriverWait(self.driver, self.wait_timeout).until(
-                EC.presence_of_element_located((by_type, action["selector"]))
-            )
+    def run_step(self, step, selector, operation):
+        """Call operation(attempt) until it returns a truthy result, retrying per the retry policy.
+        
+        A falsy result counts as a timeout. Raises RowFailure once the failure class, the
+        attempt count or the run's retry budget rules out another try.
+        """
+        attempt = 0
+        while True:
+            error = None
+            try:
+                result = operation(attempt)
+                if result:
+                    return result
+                failure_class = TIMEOUT
+            except RowFailure:
+                raise
+            except Exception as e:
+                error = e
+                failure_class = classify(e)
             
-            if action["action"] == "click":
-                element.click()
-            elif action["action"] == "input":
-                element.clear()
-                element.send_keys(action["value"])
-            elif action["action"] == "wait":
-                # Already waited for element
-                pass
-            elif action["action"] == "confirm":
-                if self.config.get("auto_confirm"):
-                    alert = self.driver.switch_to.alert
-                    alert.accept()
+            if not self.retry_policy.should_retry(failure_class, attempt):
+                if failure_class in BACKOFF and self.retry_policy.budget_exhausted():
+                    self.sink.update_status("Retry budget used up, remaining failures will not be retried")
+                raise RowFailure(failure_class, step, selector, error, "" if error else "Timed out")
             
-            if float(action["delay"]) > 0:
-                self.driver.implicitly_wait(float(action["delay"]))
-                
-        except TimeoutException:
-            self.gui.update_status(f"Timeout waiting for element: {action['selector']}")
+            self.sink.update_status(
+                f"Retrying {step} after {failure_class} ({attempt + 1}/{self.retry_policy.max_retries})"
+            )
+            delay = self.retry_policy.delay(failure_class, attempt)
+            if failure_class in (STALE, INTERCEPTED):
+                self.waits.wait_for_quiet(timeout=delay)  # Ends early once the page has settled
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    @traced("handle_action", lambda step: {"selector": step.selector})
+    def handle_action(self, step):
+        """Run one compiled post-submit step with retries; raises RowFailure when it can't be done"""
+        return self.run_step(step.label, step.selector, lambda attempt: self._execute_action(step, attempt))
+
+    @traced("execute_action", lambda step, attempt: {"action": step.name, "selector": step.selector, "attempt": attempt})
+    def _execute_action(self, step, attempt):
+        if not step.execute(self):
+            if step.needs_element:
+                self.sink.update_status(f"Timeout waiting for element: {step.selector}")
+            else:
+                self.sink.update_status("Timeout waiting for dialog")
             return False
+        if step.delay > 0:
+            # Pause at most `delay` seconds, less once the page has settled
+            self.waits.wait_for_quiet(timeout=step.delay)
         return True
 
+    def set_row_result(self, status, reason="", failure=None, step="", selector=""):
+        """Remember how the current row ended, for the run journal and the failed-rows file"""
+        self.row_result = {
+            "status": status,
+            "reason": reason,
+            "failure": failure,
+            "step": failure.step if failure else step,
+            "selector": failure.selector if failure else selector,
+            "error_class": failure.error_class if failure else "",
+            "confirmation": self.row_confirmation
+        }
+
+    def type_into(self, element, value):
+        if element is None:
+            return False
+        element.clear()
+        element.send_keys(value)
+        return True
+
+    @traced("fill_form")
     def fill_form(self, data_row):
+        self.row_confirmation = ""
+        self.set_row_result(RunJournal.FAILED)
         try:
             if not self.wait_for_page_load():
-                return False
+                raise RowFailure(TIMEOUT, "page_load", message="Form page did not finish loading")
                 
-            # Fill form fields with improved error handling
-            for mapping in self.config['field_mappings']:
-                selector_type = self.get_by_type(mapping['selector_type'])
-                element = self.wait_for_element(selector_type, mapping['web_selector'])
-                if not element:
-                    continue
+            # Locate all fields in one batch, waiting only for fields that are not ready yet
+            with self.tracer.span("locate_fields", row=self.current_row):
+                elements = self.field_locators.resolve()
+            
+            # A missing field fails the row rather than submitting the form without it. resolve()
+            # has already waited wait_timeout for it, so waiting and retrying again won't help.
+            by_types = self.field_locators.by_types
+            skip = self.field_locators.skip
+            mappings = self.config['field_mappings']
+            for position, mapping in enumerate(mappings):
+                if elements[position] is None and position not in skip:
+                    raise RowFailure(
+                        TIMEOUT, "locate_field", mapping['web_selector'],
+                        message=f"Field not found within {self.wait_timeout}s"
+                    )
+            
+            # Fields in "js" fill mode are set together in one script call first
+            fast_positions = [
+                position for position, mapping in enumerate(mappings)
+                if mapping.get('fill_mode') == "js" and position not in skip
+            ]
+            if fast_positions:
+                fast_values = [str(data_row[self.value_columns[position]]) for position in fast_positions]
                 
-                try:
-                    element.clear()
-                    element.send_keys(str(data_row[mapping['excel_column']]))
-                except Exception as e:
-                    self.gui.update_status(f"Field fill error: {str(e)}")
+                def fast_fill(attempt):
+                    if attempt:
+                        elements[:] = self.field_locators.resolve()  # Page re-rendered since the lookup
+                    fast_elements = [elements[position] for position in fast_positions]
+                    if None in fast_elements:
+                        return False
+                    self.driver.execute_script(FAST_FILL_SCRIPT, fast_elements, fast_values)
+                    return True
+                
+                with self.tracer.span("fast_fill", row=self.current_row, fields=len(fast_positions)):
+                    self.run_step("fast_fill", "", fast_fill)
+            
+            # Fill remaining fields by typing, for keystroke-sensitive inputs
+            for position, mapping in enumerate(mappings):
+                if mapping.get('fill_mode') == "js" or position in skip:
                     continue
+                selector = mapping['web_selector']
+                value = str(data_row[self.value_columns[position]])
+                
+                def fill_attempt(attempt):
+                    with self.tracer.span("fill_attempt", row=self.current_row, selector=selector, attempt=attempt):
+                        element = elements[position] if not attempt else self.wait_for_element(by_types[position], selector)
+                        return self.type_into(element, value)
                 
-                time.sleep(0.2)  # Reduced delay between fields
+                with self.tracer.span("fill_field", row=self.current_row, selector=selector):
+                    self.run_step("fill_field", selector, fill_attempt)
+                
+                # Give the page's own handlers a moment to react, at most action_delay
+                self.waits.wait_for_quiet(timeout=self.action_delay, quiet_period=self.waits.poll_interval)
             
             # Execute post-submit actions
             return self.execute_post_submit_actions()
             
         except Exception as e:
-            self.gui.update_status(f"Form fill error: {str(e)}")
+            failure = RowFailure.wrap(e, "fill_form")
+            if failure.failure_class != SESSION_DEAD and not self.session_alive():
+                failure.failure_class = SESSION_DEAD  # Waits swallow driver errors, so check directly
+            self.retry_policy.record_failure(failure.failure_class)
+            reason = f"{failure.step} failed ({failure.failure_class}): {failure}"
+            self.sink.update_status(f"Form fill error: {reason}")
+            self.set_row_result(RunJournal.FAILED, reason, failure)
+            if isinstance(e, UnexpectedAlertPresentException) or isinstance(failure.error, UnexpectedAlertPresentException):
+                self.close_dialogs()  # Don't let a stray dialog fail the following rows too
             return False
 
+    def fill_row(self, data_row):
+        """fill_form, restarting a dead browser once and retrying the row in the new session"""
+        success = self.fill_form(data_row)
+        failure = self.row_result['failure']
+        if success or not failure or failure.failure_class != SESSION_DEAD:
+            return success
+        if not self.restart_session():
+            self.session_lost = True
+            return False
+        self.sink.update_status("Retrying row in the new browser session")
+        return self.fill_form(data_row)
+
     def close_dialogs(self, max_attempts=3):
         """Close any open dialogs/alerts"""
         try:
             for _ in range(max_attempts):
                 try:
-                    alert = self.driver.switch_to.alert
+                    alert = self.waits.wait_for_alert(timeout=0)
+                    if not alert:
+                        break
                     alert.accept()
-                    time.sleep(0.5)
+                    # Let the page settle so a follow-up dialog has had its chance to open
+                    self.waits.wait_for_quiet(timeout=0.5)
                 except:
                     break
         except Exception as e:
-            self.gui.update_status(f"Dialog close error: {str(e)}")
+            self.sink.update_status(f"Dialog close error: {str(e)}")
 
     def redirect_to_form(self):
         """Redirect back to form URL"""
         try:
             if self.config.get('form_url'):
-                self.gui.update_status("Redirecting to form page...")
+                self.sink.update_status("Redirecting to form page...")
                 self.driver.get(self.config['form_url'])
                 return self.wait_for_page_load()
             return True
         except Exception as e:
-            self.gui.update_status(f"Redirect error: {str(e)}")
+            self.sink.update_status(f"Redirect error: {str(e)}")
             return False
 
     def execute_post_submit_actions(self):
-        for action in sorted(self.config['post_submit_actions'], key=lambda x: x['order']):
-            if action["action"] == "skip":
-                should_skip = self.handle_action(action)
-                if should_skip:
-                    self.gui.update_status("Skipping row due to condition met")
+        for position, step in enumerate(self.action_plan.steps):
+            if position in self.skip_actions:
+                continue
+            if isinstance(step, SkipStep):
+                # A skip check that doesn't match is an answer, not a failure, so it isn't retried
+                if self.check_skip_condition(step.condition, step.by, step.selector):
+                    self.sink.update_status("Skipping row due to condition met")
+                    self.set_row_result(
+                        RunJournal.SKIPPED, f"Skip condition met (action {step.order})",
+                        step=step.label, selector=step.selector
+                    )
                     self.close_dialogs()  # Close any dialogs
                     if not self.redirect_to_form():  # Redirect back to form
-                        self.gui.update_status("Failed to redirect after skip")
+                        self.sink.update_status("Failed to redirect after skip")
                     return True
-            else:
-                if not self.handle_action(action):
-                    return False
-                if not self.wait_for_page_load(5):
-                    self.gui.update_status("Page load timeout after action")
+                continue
+            if step.condition and not self.check_skip_condition(step.condition, step.by, step.selector):
+                continue  # Conditional step whose condition doesn't hold on this row
+            self.handle_action(step)  # Raises RowFailure, which fill_form records
+            if not self.wait_for_page_load(5):
+                self.sink.update_status("Page load timeout after action")
+            self.capture_confirmation()
+        self.set_row_result(RunJournal.SUCCESS)
         return True
 
+    def capture_confirmation(self):
+        """Read the configured confirmation element (e.g. a reference number) the first time it shows up"""
+        if not self.confirmation_locator or self.row_confirmation:
+            return
+        try:
+            text = self.driver.execute_script(CONFIRMATION_SCRIPT, *self.confirmation_locator)
+        except WebDriverException:
+            return  # Page changing under the script; tried again after the next action
+        if text:
+            self.row_confirmation = str(text).strip()
+
+    def run_preflight(self, columns):
+        """Check mappings against the data and the live form; False means don't start"""
+        if not self.settings.get('preflight', 1):
+            return True
+        try:
+            return Preflight(self).run(columns)
+        except Exception as e:
+            self.sink.update_status(f"Preflight error: {str(e)}")
+            return False
+
+    def open_journal(self):
+        """Open the resume journal for this run, or None when resuming is disabled"""
+        if not self.resume_runs:
+            return None
+        try:
+            # Writing results into the data file changes its mtime, which must not start a new journal
+            return RunJournal.for_config(self.config, track_version=self.writeback_mode != "inplace")
+        except Exception as e:
+            self.sink.update_status(f"Run journal unavailable: {str(e)}")
+            return None
+
+    def open_dead_letters(self):
+        """Start a failed-rows file for this run, or None when the output is turned off"""
+        if not self.settings.get('dead_letter_output', 1):
+            return None
+        return DeadLetterWriter(self.config)
+
+    def open_result_writer(self):
+        """Start writing outcomes back to the data file, or None when write-back is off"""
+        if self.writeback_mode not in ("copy", "inplace") or not self.config.get('excel_file'):
+            return None
+        writer = ResultWriter(self.config, self.writeback_mode)
+        self.sink.update_status(f"Writing results to {writer.path}")
+        return writer
+
+    def close_result_writer(self):
+        if not self.result_writer:
+            return
+        self.result_writer.close()
+        if self.result_writer.error:
+            self.sink.update_status(f"Result write-back error: {self.result_writer.error}")
+        elif self.result_writer.count:
+            self.sink.update_status(f"Results of {self.result_writer.count} rows saved to {self.result_writer.path}")
+        self.result_writer = None
+
+    def close_dead_letters(self):
+        if not self.dead_letters:
+            return
+        self.dead_letters.close()
+        if self.dead_letters.count:
+            self.sink.update_status(
+                f"{self.dead_letters.count} failed or skipped rows saved to {self.dead_letters.path}"
+            )
+
+    def record_result(self, index, row, journal, row_result=None):
+        """Store how a row ended in the run journal, the write-back, and the failed-rows file unless it succeeded"""
+        row_result = row_result or self.row_result
+        self.outcomes.add(row_result['status'])
+        if journal:
+            journal.record(index, row_result['status'], row_result['reason'])
+        if self.result_writer:
+            self.result_writer.add(index, row_result)
+        if self.dead_letters and row_result['status'] != RunJournal.SUCCESS:
+            try:
+                self.dead_letters.write(index, row, row_result)
+            except Exception as e:
+                self.sink.update_status(f"Failed-rows file error: {str(e)}")
+
+    def finish_trace(self):
+        """Export collected spans and report per-step timings at the end of a run"""
+        if not self.tracer.enabled or not self.tracer.events:
+            return
+        try:
+            path = self.tracer.export_chrome_trace(
+                os.path.join("traces", f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            )
+            self.sink.update_status(f"Trace saved to {path}")
+        except Exception as e:
+            self.sink.update_status(f"Trace export error: {str(e)}")
+        for line in self.tracer.format_summary():
+            self.sink.update_status(f"Timing - {line}")
+
+    def report_outcomes(self):
+        self.sink.update_status(f"Rows - {self.outcomes.format_summary()}")
+
+    def report_retries(self):
+        for line in self.retry_policy.format_summary():
+            self.sink.update_status(f"Retries - {line}")
+
+    def resume_rows(self, journal, data):
+        """Rows of this data the journal has already completed, with progress moved past them.
+
+        A failed-rows file is journaled with the run it came from, so only journaled rows
+        that are part of this data count.
+        """
+        done_rows = journal.completed_rows() if journal else set()
+        index = getattr(data, 'index', None)  # Streams are read in full, so every journaled row is in them
+        if index is not None:
+            done_rows &= set(index)
+        if done_rows:
+            self.sink.update_status(f"Resuming run: {len(done_rows)} rows already completed")
+            self.rows_done = len(done_rows)
+            self.sink.set_progress(self.rows_done)
+        return done_rows
+
+    def row_done(self):
+        """Count a handled row; progress follows this count, as row indexes can be sparse (re-runs, resumes)"""
+        self.rows_done += 1
+        self.sink.set_progress(self.rows_done)
+
+    def process_row(self, index, row, total_rows, journal):
+        """Fill and submit one row in the browser; False if the run cannot continue"""
+        self.sink.update_status(f"Processing row {index + 1} ({self.rows_done + 1} of {total_rows})")
+        
+        self.current_row = index
+        success = self.fill_row(row)
+        self.record_result(index, row, journal)
+        self.row_done()
+        if success:
+            self.sink.update_status(f"Successfully processed row {index + 1}")
+        else:
+            self.sink.update_status(f"Error in row {index + 1}")
+        
+        if self.session_lost:
+            return False
+        if not self.count_row():
+            self.sink.update_status("Could not restart browser session")
+            return False
+        return True
+
+    def wait_while_paused(self):
+        while self.sink.paused and not self.sink.stop_flag:
+            time.sleep(0.5)  # Wait while paused
+
+    def process_rows(self, rows, total_rows, journal):
+        """Process (index, row) pairs one by one; True if every row was handled"""
+        for index, row in rows:
+            if self.sink.stop_flag:
+                self.sink.update_status("Automation stopped by user")
+                return False
+            self.wait_while_paused()
+            if not self.process_row(index, row, total_rows, journal):
+                return False
+        return True
+
+    def validate_config(self):
+        """Report invalid post-submit actions and transforms; False means the run must not start"""
+        for error in self.action_plan.errors:
+            self.sink.update_status(f"Invalid post-submit action - {error}")
+        for error in self.transforms.errors:
+            self.sink.update_status(f"Invalid transform - {error}")
+        return not self.action_plan.errors and not self.transforms.errors
+
     def run_automation(self, data):
+        if not self.validate_config():
+            self.sink.update_status("Automation completed")
+            return
+        
+        if self.worker_count > 1 and self.submit_mode != "replay":
+            from worker_pool import WorkerPool
+            if data is None or data.empty:
+                self.sink.update_status("Automation error: No data loaded from Excel file")
+                return
+            return WorkerPool(self, self.worker_count).run(data)
+            
         if not self.setup_driver():
-            self.gui.update_status("Failed to initialize Chrome")
+            self.sink.update_status("Failed to initialize Chrome")
             return
             
+        journal = None
+        finished = False
         try:
             if data is None or data.empty:
                 raise ValueError("No data loaded from Excel file")
@@ -344,33 +839,43 @@ class WebAutomator:
                 raise ValueError("Excel file contains no data rows")
             
             if not self.login():
-                self.gui.update_status("Login failed")
-                self.driver.quit()
+                self.sink.update_status("Login failed")
+                self.release_driver()
                 return
             
-            self.gui.update_status("Login successful")
-            self.gui.progress['maximum'] = total_rows
+            self.sink.update_status("Login successful")
+            if not self.run_preflight(data.columns):
+                return
             
-            for index, row in data.iterrows():
-                if self.gui.stop_flag:
-                    self.gui.update_status("Automation stopped by user")
-                    break
-                    
-                while self.gui.paused:
-                    time.sleep(0.5)  # Wait while paused
-                    continue
-                    
-                self.gui.progress['value'] = index + 1
-                self.gui.update_status(f"Processing row {index + 1} of {total_rows}")
-                
-                if not self.fill_form(row):
-                    self.gui.update_status(f"Error in row {index + 1}")
-                    continue
-                self.gui.update_status(f"Successfully processed row {index + 1}")
+            # Only the mapped columns are kept, with transformed values computed up front,
+            # whole columns at a time; rows are then compact Records rather than pandas Series
+            data = compact_rows(data, self.transforms)
+            self.sink.set_progress(0, total_rows)
+            
+            journal = self.open_journal()
+            self.dead_letters = self.open_dead_letters()
+            self.result_writer = self.open_result_writer()
+            done_rows = self.resume_rows(journal, data)
+            
+            rows = ((index, row) for index, row in data.iterrows() if index not in done_rows)
+            if self.submit_mode == "replay":
+                finished = ReplayEngine(self).run(rows, total_rows, journal)
+            else:
+                finished = self.process_rows(rows, total_rows, journal)
         
         except Exception as e:
-            self.gui.update_status(f"Automation error: {str(e)}")
+            self.sink.update_status(f"Automation error: {str(e)}")
         finally:
-            self.gui.update_status("Automation completed")
-            if self.driver:
-                self.driver.quit()
+            self.finished = finished
+            if finished:
+                # len(data) may have been an estimate, so fill the bar with the rows really handled
+                self.sink.set_progress(self.rows_done, self.rows_done)
+            if journal:
+                journal.close(finished)
+            self.close_dead_letters()
+            self.close_result_writer()
+            self.release_driver()
+            self.finish_trace()
+            self.report_retries()
+            self.report_outcomes()
+            self.sink.update_status("Automation completed")
@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import numpy as np
+import pandas as pd
+from row_store import record_type
+
+class WorkbookCache:
+    """Parsed sheets kept on disk as NumPy arrays and memory-mapped back on later loads.
+
+    A sheet is stored as three .npy files and a small JSON header. The files hold the
+    UTF-8 bytes of every cell, one column after another, the byte offsets where each cell
+    starts, and the row numbers. Keys come from the workbook's path, size, mtime and sheet,
+    so an edited workbook is parsed again. Its older entries are deleted once the new one
+    has been written.
+    """
+    def __init__(self, cache_dir="cache/workbooks", chunk_rows=20000):
+        self.cache_dir = cache_dir
+        self.chunk_rows = chunk_rows  # Rows held in memory at a time while storing
+        self.lock = threading.Lock()
+        self.building = set()  # Keys being written in the background
+
+    @staticmethod
+    def file_version(filepath):
+        stat = os.stat(filepath)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def make_key(self, filepath, sheet_name, version=None):
+        file_id = hashlib.sha1(os.path.abspath(filepath).encode('utf-8')).hexdigest()[:16]
+        version = version or self.file_version(filepath)
+        version = hashlib.sha1(f"{version}:{sheet_name}".encode('utf-8')).hexdigest()[:16]
+        return f"{file_id}_{version}"
+
+    def _paths(self, key):
+        base = os.path.join(self.cache_dir, key)
+        return {
+            "meta": f"{base}.json",
+            "data": f"{base}.data.npy",
+            "offsets": f"{base}.offsets.npy",
+            "index": f"{base}.index.npy"
+        }
+
+    @staticmethod
+    def _map(path):
+        try:
+            return np.load(path, mmap_mode='r')
+        except ValueError:
+            return np.load(path)  # Empty arrays can't be memory-mapped
+
+    def load(self, filepath, sheet_name):
+        """CachedSheet for this version of the workbook, or None if it isn't cached"""
+        paths = self._paths(self.make_key(filepath, sheet_name))
+        try:
+            with open(paths['meta'], encoding='utf-8') as f:
+                meta = json.load(f)
+            return CachedSheet(
+                meta['sheet_name'], meta['columns'],
+                self._map(paths['data']), self._map(paths['offsets']), self._map(paths['index'])
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store(self, filepath, sheet_name, resolved_sheet, columns, rows, version):
+        """Write (index, values) rows of a sheet; returns the CachedSheet, or None if it couldn't be saved.
+
+        Rows must already be normalised the way ExcelHandler reads them (no blank rows).
+        version is file_version() taken before the rows were read; if the file has changed
+        since, the rows may mix both versions and nothing is stored.
+
+        Rows are consumed chunk_rows at a time and written to scratch files as they pass,
+        then copied into the column-ordered files, so memory stays flat however big the sheet.
+        """
+        key = self.make_key(filepath, sheet_name, version)
+        paths = self._paths(key)
+        temporary = {name: f"{path}.tmp" for name, path in paths.items()}
+        scratch = {name: f"{paths['meta']}.{name}.scratch" for name in ("data", "offsets", "index")}
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            segments, row_count = self._write_scratch(scratch, len(columns), rows)
+            self._write_arrays(scratch, temporary, segments, len(columns), row_count)
+            with open(temporary['meta'], 'w', encoding='utf-8') as f:
+                json.dump({"sheet_name": resolved_sheet, "columns": list(columns), "version": version}, f)
+            if self.file_version(filepath) != version:
+                return None
+            # The header goes last, so a half-written entry is never loaded
+            for name in ("data", "offsets", "index", "meta"):
+                os.replace(temporary[name], paths[name])
+        except OSError:
+            return None
+        finally:
+            for path in list(scratch.values()) + list(temporary.values()):
+                if os.path.exists(path):
+                    os.remove(path)
+        self._prune(key, version)
+        return self.load(filepath, sheet_name)
+
+    def _write_scratch(self, scratch, column_count, rows):
+        """Append rows to scratch files chunk by chunk.
+
+        Returns, per column, the (data position, data length, offsets position, row count)
+        of each chunk written, and the number of rows.
+        """
+        segments = [[] for _ in range(column_count)]
+        row_count = 0
+        with open(scratch['data'], 'wb') as data, open(scratch['offsets'], 'wb') as offsets, \
+                open(scratch['index'], 'wb') as index:
+            chunk = []
+
+            def flush():
+                index.write(np.array([row_index for row_index, _ in chunk], dtype=np.int64).tobytes())
+                for position in range(column_count):
+                    cells = [
+                        str(values[position]).encode('utf-8') if position < len(values) else b""
+                        for _, values in chunk
+                    ]
+                    ends = np.cumsum([len(cell) for cell in cells], dtype=np.int64)
+                    raw = b"".join(cells)
+                    segments[position].append((data.tell(), len(raw), offsets.tell(), len(cells)))
+                    data.write(raw)
+                    offsets.write(ends.tobytes())
+
+            for row in rows:
+                chunk.append(row)
+                if len(chunk) >= self.chunk_rows:
+                    flush()
+                    row_count += len(chunk)
+                    chunk = []
+            if chunk:
+                flush()
+                row_count += len(chunk)
+        return segments, row_count
+
+    def _write_arrays(self, scratch, temporary, segments, column_count, row_count):
+        """Copy the scratch chunks into the column-ordered .npy files, writing each file front to back"""
+        total = sum(length for column in segments for _, length, _, _ in column)
+        with open(scratch['data'], 'rb') as raw, _npy_file(temporary['data'], np.uint8, (total,)) as out:
+            for column in segments:
+                for data_at, length, _, _ in column:
+                    raw.seek(data_at)
+                    out.write(raw.read(length))
+        start = 0
+        with open(scratch['offsets'], 'rb') as ends, \
+                _npy_file(temporary['offsets'], np.int64, (column_count, row_count + 1)) as out:
+            for column in segments:
+                out.write(np.int64(start).tobytes())
+                for _, length, offsets_at, count in column:
+                    ends.seek(offsets_at)
+                    out.write((np.frombuffer(ends.read(count * 8), dtype=np.int64) + start).tobytes())
+                    start += length
+        with open(scratch['index'], 'rb') as raw, _npy_file(temporary['index'], np.int64, (row_count,)) as out:
+            shutil.copyfileobj(raw, out)
+
+    def _prune(self, key, version):
+        """Delete entries saved from older versions of the same workbook"""
+        prefix = key.split("_")[0] + "_"
+        try:
+            for name in os.listdir(self.cache_dir):
+                if not name.startswith(prefix) or not name.endswith(".json"):
+                    continue
+                with open(os.path.join(self.cache_dir, name), encoding='utf-8') as f:
+                    if json.load(f).get('version') == version:
+                        continue
+                for stale in self._paths(name[:-len(".json")]).values():
+                    if os.path.exists(stale):
+                        os.remove(stale)
+        except (OSError, ValueError):
+            pass
+
+    def build_in_background(self, handler, sheet_name):
+        """Cache a sheet from a separate streaming pass, so the next load is fast"""
+        key = self.make_key(handler.filepath, sheet_name)
+        with self.lock:
+            if key in self.building:
+                return
+            self.building.add(key)
+
+        def build():
+            try:
+                version = self.file_version(handler.filepath)
+                reader = type(handler)(handler.filepath)  # Its own handler, the caller's keeps reading
+                columns = reader.read_column_names(sheet_name)
+                rows = ((index, row.values) for index, row in reader.iter_rows(sheet_name, columns))
+                self.store(reader.filepath, sheet_name, reader.sheet_name, columns, rows, version)
+            except Exception:
+                pass  # The cache is only a speed-up; the run reads the workbook itself
+            finally:
+                with self.lock:
+                    self.building.discard(key)
+
+        thread = threading.Thread(target=build)
+        thread.daemon = True
+        thread.start()
+
+workbook_cache = WorkbookCache()
+
+def _npy_file(path, dtype, shape):
+    """Open a .npy file for writing after its header; the caller writes the array's bytes in order"""
+    f = open(path, 'wb')
+    np.lib.format.write_array_header_1_0(f, {
+        'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': shape
+    })
+    return f
+
+class CachedSheet:
+    """A sheet loaded from the workbook cache; cells are decoded only when read"""
+    def __init__(self, sheet_name, columns, data, offsets, index):
+        self.sheet_name = sheet_name
+        self.columns = list(columns)
+        self.data = data
+        self.offsets = offsets
+        self.index = index
+
+    def __len__(self):
+        return len(self.index)
+
+    def column(self, position, start=0, stop=None):
+        """Cell strings of one column for rows start to stop"""
+        stop = len(self.index) if stop is None else stop
+        bounds = self.offsets[position, start:stop + 1]
+        raw = self.data[bounds[0]:bounds[-1]].tobytes()
+        relative = (bounds - bounds[0]).tolist()
+        return [raw[begin:end].decode('utf-8') for begin, end in zip(relative, relative[1:])]
+
+    def frame(self, columns=None):
+        """DataFrame of the given columns (those the sheet has), or of every column"""
+        positions = {column: position for position, column in enumerate(self.columns)}
+        names = self.columns if columns is None else [column for column in columns if column in positions]
+        return pd.DataFrame(
+            {name: self.column(positions[name]) for name in names},
+            index=self.index.tolist(), columns=names, dtype=object
+        )
+
+class CachedRowStream:
+    """Row stream over a CachedSheet, decoding chunk_size rows at a time into Records"""
+    def __init__(self, sheet, selected=None, chunk_size=1000):
+        self.sheet = sheet
+        self.selected = selected
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.sheet)
+
+    @property
+    def empty(self):
+        return len(self.sheet) == 0
+
+    @property
+    def columns(self):
+        if self.selected is None:
+            return list(self.sheet.columns)
+        return [column for column in self.selected if column in self.sheet.columns]
+
+    def select(self, columns):
+        return CachedRowStream(self.sheet, list(columns), self.chunk_size)
+
+    def iterrows(self):
+        names = self.columns
+        positions = [self.sheet.columns.index(name) for name in names]
+        make = record_type(names)
+        total = len(self.sheet)
+        for start in range(0, total, self.chunk_size):
+            stop = min(start + self.chunk_size, total)
+            cells = [self.sheet.column(position, start, stop) for position in positions]
+            indexes = self.sheet.index[start:stop].tolist()
+            for index, values in zip(indexes, zip(*cells) if cells else [()] * len(indexes)):
+                yield index, make(values)
@@ -0,0 +1,169 @@
+import queue
+import threading
+from web_automation import WebAutomator
+from row_store import compact_rows
+
+class WorkerPool:
+    """Run several independent browser sessions that pull rows from a shared queue"""
+    def __init__(self, lead, worker_count):
+        # The automator that started the run keeps the shared journal, trace, retry budget
+        # and tallies; workers get their own automators
+        self.lead = lead
+        self.config = lead.config
+        self.sink = lead.sink
+        self.settings = lead.settings
+        self.driver_pool = lead.driver_pool
+        self.worker_count = worker_count
+        self.rows = queue.Queue(maxsize=worker_count * 2)  # Small buffer keeps producer ahead of workers
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.active_workers = 0
+        self.journal = None
+
+    def _put(self, item):
+        """Queue an item, giving up if stopped or no worker is left to consume it"""
+        while True:
+            try:
+                self.rows.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if self.sink.stop_flag or self.active_workers == 0:
+                    return False
+
+    def _row_done(self):
+        with self.lock:
+            self.completed += 1
+            self.sink.set_progress(self.completed)
+
+    def _worker(self, worker_id, ready):
+        automator = WebAutomator(
+            self.config, self.sink, self.settings, self.driver_pool, self.lead.tracer, self.lead.retry_policy
+        )
+        automator.dead_letters = self.lead.dead_letters
+        automator.result_writer = self.lead.result_writer
+        automator.outcomes = self.lead.outcomes
+        automator.field_locators.skip = set(self.lead.field_locators.skip)
+        automator.skip_actions = set(self.lead.skip_actions)
+        try:
+            if not automator.setup_driver():
+                self.sink.update_status(f"[Worker {worker_id}] Failed to initialize Chrome")
+                return
+            if not automator.login():
+                self.sink.update_status(f"[Worker {worker_id}] Login failed")
+                return
+            self.sink.update_status(f"[Worker {worker_id}] Login successful")
+            ready.set()
+            
+            while True:
+                item = self.rows.get()
+                if item is None or self.sink.stop_flag:
+                    break
+                    
+                automator.wait_while_paused()
+                
+                index, row = item
+                self.sink.update_status(f"[Worker {worker_id}] Processing row {index + 1}")
+                automator.current_row = index
+                success = automator.fill_row(row)
+                automator.record_result(index, row, self.journal)
+                if success:
+                    self.sink.update_status(f"[Worker {worker_id}] Successfully processed row {index + 1}")
+                else:
+                    self.sink.update_status(f"[Worker {worker_id}] Error in row {index + 1}")
+                self._row_done()
+                if automator.session_lost:
+                    break
+                if not automator.count_row():
+                    self.sink.update_status(f"[Worker {worker_id}] Could not restart browser session")
+                    break
+        except Exception as e:
+            self.sink.update_status(f"[Worker {worker_id}] Worker error: {str(e)}")
+        finally:
+            with self.lock:
+                self.active_workers -= 1
+            automator.release_driver()
+
+    def preflight(self, data):
+        """Run the preflight check once in the lead's own session before any worker starts"""
+        if not self.settings.get('preflight', 1):
+            return True
+        try:
+            if not self.lead.setup_driver():
+                self.sink.update_status("Failed to initialize Chrome")
+                return False
+            if not self.lead.login():
+                self.sink.update_status("Login failed")
+                return False
+            return self.lead.run_preflight(data.columns)
+        finally:
+            self.lead.release_driver()
+
+    def run(self, data):
+        if not self.preflight(data):
+            self.sink.update_status("Automation completed")
+            return
+        
+        # Transforms run after the preflight, which reports mapped columns missing from the file
+        data = compact_rows(data, self.lead.transforms)
+        total_rows = len(data)
+        self.sink.set_progress(0, total_rows)
+        self.sink.update_status(f"Starting {self.worker_count} workers")
+        
+        self.journal = self.lead.open_journal()
+        self.lead.dead_letters = self.lead.open_dead_letters()
+        self.lead.result_writer = self.lead.open_result_writer()
+        done_rows = self.lead.resume_rows(self.journal, data)
+        self.completed = len(done_rows)
+        # len(data) can be an estimate (sheet dimensions count blank rows), so the rows
+        # actually handed out are counted to tell whether every row was processed
+        queued = len(done_rows)
+        
+        ready = threading.Event()
+        self.active_workers = self.worker_count
+        workers = []
+        for worker_id in range(1, self.worker_count + 1):
+            worker = threading.Thread(target=self._worker, args=(worker_id, ready))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+        
+        finished = False
+        try:
+            # Rows are queued as soon as any worker has logged in
+            while not ready.wait(0.5):
+                if self.sink.stop_flag or self.active_workers == 0:
+                    break
+            
+            for index, row in data.iterrows():
+                if self.sink.stop_flag:
+                    self.sink.update_status("Automation stopped by user")
+                    break
+                if index in done_rows:
+                    continue
+                if not self._put((index, row)):
+                    break
+                queued += 1
+            else:
+                finished = True
+        finally:
+            for _ in workers:
+                if not self._put(None):
+                    break
+            for worker in workers:
+                worker.join()
+            # Rows still queued when workers gave up were never processed
+            finished = finished and self.completed == queued
+            if self.journal:
+                self.journal.close(finished)
+            self.lead.finished = finished
+            if finished:
+                self.sink.set_progress(self.completed, self.completed)
+            self.lead.close_dead_letters()
+            self.lead.close_result_writer()
+            
+            if self.active_workers == 0 and not finished and not self.sink.stop_flag:
+                self.sink.update_status(f"Workers stopped after {self.completed} of {total_rows} rows")
+            self.lead.finish_trace()
+            self.lead.report_retries()
+            self.lead.report_outcomes()
+            self.sink.update_status("Automation completed")